@@ -5,4 +5,101 @@ from django.conf import settings
 OBJ_CACHE_DURATION = int(getattr(settings, 'EVEONLINE_OBJ_CACHE_DURATION', 600))
 
 # set this to alter default data source API
+# several separated by commas, like 'esi,xml', fail over between them
 DEFAULT_PROVIDER = getattr(settings, 'EVEONLINE_DEFAULT_PROVIDER', 'esi')
+
+# maximum number of API objects each process holds in local memory in front of the django cache, 0 to disable
+LOCAL_CACHE_MAX_ENTRIES = int(getattr(settings, 'EVEONLINE_LOCAL_CACHE_MAX_ENTRIES', 1000))
+
+# seconds API objects are held in local memory, per object type
+LOCAL_CACHE_DURATIONS = dict(
+    {
+        'character': 60,
+        'corporation': 60,
+        'alliance': 300,
+        'itemtype': 3600,
+        'faction': 3600,
+    },
+    **getattr(settings, 'EVEONLINE_LOCAL_CACHE_DURATIONS', {})
+)
+
+# maximum simultaneous API requests when resolving many objects at once
+# errors count toward the ESI error limit, so keep this modest
+MAX_CONCURRENCY = int(getattr(settings, 'EVEONLINE_MAX_CONCURRENCY', 10))
+
+# ESI server and datasource used by the asyncio provider
+ESI_BASE_URL = getattr(settings, 'EVEONLINE_ESI_BASE_URL', 'https://esi.evetech.net')
+ESI_DATASOURCE = getattr(settings, 'EVEONLINE_ESI_DATASOURCE', 'tranquility')
+
+# number of models refreshed by each bulk update task
+BULK_UPDATE_CHUNK_SIZE = int(getattr(settings, 'EVEONLINE_BULK_UPDATE_CHUNK_SIZE', 1000))
+
+# refresh characters by checking their affiliations and only updating those which moved
+# instead of retrieving every character in full
+INCREMENTAL_CHARACTER_UPDATES = bool(getattr(settings, 'EVEONLINE_INCREMENTAL_CHARACTER_UPDATES', True))
+
+# snapshot mixin properties return objects built from the stored IDs and names,
+# only contacting the API when other attributes are accessed
+SNAPSHOT_ENTITIES = bool(getattr(settings, 'EVEONLINE_SNAPSHOT_ENTITIES', True))
+
+# serve item types and factions from the models loaded by the import_sde command instead of the API
+SDE_PROVIDER = bool(getattr(settings, 'EVEONLINE_SDE_PROVIDER', False))
+
+# answer from the stored models before the API, storing what the API returns
+DATABASE_PROVIDER = bool(getattr(settings, 'EVEONLINE_DATABASE_PROVIDER', False))
+
+# seconds since a model was last updated before it is retrieved again by the database provider, per object type
+# None to always use the stored model
+DATABASE_MAX_AGES = dict(
+    {
+        'character': 3600,
+        'corporation': 3600,
+        'itemtype': None,
+        'faction': None,
+    },
+    **getattr(settings, 'EVEONLINE_DATABASE_MAX_AGES', {})
+)
+
+# consecutive failed calls before a provider is skipped when failing over between providers
+FAILOVER_ERROR_THRESHOLD = int(getattr(settings, 'EVEONLINE_FAILOVER_ERROR_THRESHOLD', 5))
+
+# seconds a failing provider is skipped before it is tried again
+FAILOVER_COOLDOWN = int(getattr(settings, 'EVEONLINE_FAILOVER_COOLDOWN', 60))
+
+# remaining ESI errors below which background requests wait for the error window to reset
+# interactive requests wait once fewer than half of these remain
+ESI_ERROR_LIMIT_THRESHOLD = int(getattr(settings, 'EVEONLINE_ESI_ERROR_LIMIT_THRESHOLD', 20))
+
+# seconds cached objects with an ETag are kept after expiring, so they can be revalidated instead of retrieved again
+ETAG_RETENTION = int(getattr(settings, 'EVEONLINE_ETAG_RETENTION', 86400))
+
+# seconds to wait for another thread or process already retrieving the same object before retrieving it anyway
+SINGLE_FLIGHT_TIMEOUT = int(getattr(settings, 'EVEONLINE_SINGLE_FLIGHT_TIMEOUT', 10))
+
+# seconds expired API objects are still served from the cache while a fresh copy is retrieved, per object type
+# 0 to always wait for a fresh copy
+STALE_DURATIONS = dict(
+    {
+        'character': 0,
+        'corporation': 0,
+        'alliance': 0,
+        'itemtype': 0,
+        'faction': 0,
+    },
+    **getattr(settings, 'EVEONLINE_STALE_DURATIONS', {})
+)
+
+# how stale objects are retrieved again: 'thread' in the serving process, or 'celery' as a task
+STALE_REFRESH = getattr(settings, 'EVEONLINE_STALE_REFRESH', 'thread')
+
+# seconds an ID which doesn't exist is remembered, so it isn't requested from the API again, 0 to disable
+NEGATIVE_CACHE_DURATION = int(getattr(settings, 'EVEONLINE_NEGATIVE_CACHE_DURATION', 300))
+
+# maximum objects per second loaded when warming the cache from stored models, 0 for no limit
+WARM_CACHE_RATE = int(getattr(settings, 'EVEONLINE_WARM_CACHE_RATE', 200))
+
+# cache key names, like 'alliance__99000006', of objects loaded first when warming the cache even if not stored
+WARM_CACHE_HOT_KEYS = list(getattr(settings, 'EVEONLINE_WARM_CACHE_HOT_KEYS', []))
+
+# path of a local SQLite file holding API objects beneath the django cache, surviving restarts, None to disable
+PERSISTENT_CACHE_PATH = getattr(settings, 'EVEONLINE_PERSISTENT_CACHE_PATH', None)
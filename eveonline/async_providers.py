@@ -0,0 +1,317 @@
+"""
+asyncio counterparts of the providers, for use in async views and consumers
+Requires Python 3.5+ and aiohttp: pip install adarnauth-eveonline[async]
+"""
+from __future__ import unicode_literals
+from eveonline.app_settings import ESI_BASE_URL, ESI_DATASOURCE, MAX_CONCURRENCY, ESI_ERROR_LIMIT_THRESHOLD
+from eveonline.providers import ObjectNotFound, Corporation, Alliance, Character, ItemType, Faction, \
+    CachingProviderWrapper, EveSwaggerProvider, chunked, esi_scheduler, eve_provider_factory, faction_reference, \
+    parse_expires
+import aiohttp
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncEveSwaggerProvider(object):
+    """
+    Retrieves data from ESI without blocking the event loop
+    Returns the same objects as :class:`eveonline.providers.EveSwaggerProvider`, however relation properties on
+    those objects such as `character.corporation` remain synchronous and use the default provider
+    Requests report to and respect the ESI error limit shared with the synchronous provider, holding as interactive
+    requests do
+    """
+
+    bulk_chunk_size = EveSwaggerProvider.bulk_chunk_size
+    bisect_min_size = EveSwaggerProvider.bisect_min_size
+
+    def __init__(self, session=None, max_concurrency=None):
+        """
+        :param session: :class:`aiohttp.ClientSession` to share, otherwise one is created on first use
+        :param max_concurrency: maximum simultaneous requests of a created session,
+        defaults to settings.EVEONLINE_MAX_CONCURRENCY
+        """
+        self._session = session
+        self.max_concurrency = max_concurrency or MAX_CONCURRENCY
+        self.adapter = None
+
+    def __str__(self):
+        return 'esi'
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.max_concurrency))
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @staticmethod
+    async def _in_executor(func, *args):
+        return await asyncio.get_event_loop().run_in_executor(None, func, *args)
+
+    async def _error_limit_low(self, threshold):
+        limit = await self._in_executor(esi_scheduler.error_limit)
+        return limit if limit and limit[0] < threshold and limit[1] > time.time() else None
+
+    async def _wait_for_error_limit(self):
+        limit = await self._error_limit_low(ESI_ERROR_LIMIT_THRESHOLD // 2)
+        while limit:
+            logger.warning('%s ESI errors remain, holding asyncio request for %.0fs', limit[0], limit[1] - time.time())
+            await asyncio.sleep(max(0, limit[1] - time.time()))
+            limit = await self._error_limit_low(ESI_ERROR_LIMIT_THRESHOLD // 2)
+
+    async def _request(self, method, path, obj_id=None, type_name=None, **kwargs):
+        """
+        :return: tuple of (decoded response, response headers)
+        :raises ObjectNotFound: if ESI does not recognise the ID
+        """
+        await self._wait_for_error_limit()
+        url = '%s%s' % (ESI_BASE_URL, path)
+        async with self.session.request(method, url, params={'datasource': ESI_DATASOURCE}, **kwargs) as response:
+            # errors included, as they are what the limit counts
+            await self._in_executor(esi_scheduler.update, response.headers)
+            if response.status in (404, 422):
+                raise ObjectNotFound(obj_id, type_name)
+            response.raise_for_status()
+            return await response.json(), response.headers
+
+    async def _faction_index(self):
+        # shares the synchronous provider's faction list, only reloading it when expired
+        if faction_reference.stale:
+            data, headers = await self._request('GET', '/v1/universe/factions/')
+            faction_reference.load({f['faction_id']: f for f in data}, parse_expires(headers))
+        return faction_reference.index()
+
+    async def get_alliance(self, alliance_id):
+        (data, _), (corps, _) = await asyncio.gather(
+            self._request('GET', '/v1/alliances/%s/' % alliance_id, alliance_id, 'alliance'),
+            self._request('GET', '/v1/alliances/%s/corporations/' % alliance_id, alliance_id, 'alliance'),
+        )
+        return Alliance(
+            alliance_id,
+            data['alliance_name'],
+            data['ticker'],
+            corps,
+            data['executor_corporation_id'],
+        )
+
+    async def get_corporation(self, corp_id):
+        data, _ = await self._request('GET', '/v3/corporations/%s/' % corp_id, corp_id, 'corporation')
+        if 'faction' in data:
+            await self._faction_index()
+            faction_id = faction_reference.id_from_name(data['faction'])
+        else:
+            faction_id = None
+        return Corporation(
+            corp_id,
+            data['corporation_name'],
+            data['ticker'],
+            data['ceo_id'],
+            data['member_count'],
+            data.get('alliance_id'),
+            faction_id,
+        )
+
+    async def get_character(self, character_id):
+        data, _ = await self._request('GET', '/v4/characters/%s/' % character_id, character_id, 'character')
+        return Character(character_id, data['name'], data['corporation_id'])
+
+    async def get_itemtype(self, type_id):
+        data, _ = await self._request('GET', '/v2/universe/types/%s/' % type_id, type_id, 'type')
+        return ItemType(type_id, data['name'])
+
+    async def get_faction(self, faction_id):
+        data = (await self._faction_index()).get(int(faction_id))
+        if data is None:
+            raise ObjectNotFound(faction_id, 'faction')
+        return Faction(data['faction_id'], data['name'], data['description'])
+
+    @staticmethod
+    async def _get_many(method, obj_ids):
+        async def get(obj_id):
+            try:
+                return await method(obj_id)
+            except ObjectNotFound:
+                return None
+
+        obj_ids = list(set(int(obj_id) for obj_id in obj_ids))
+        results = await asyncio.gather(*[get(obj_id) for obj_id in obj_ids])
+        return {obj_id: obj for obj_id, obj in zip(obj_ids, results) if obj is not None}
+
+    async def _post_valid(self, path, obj_ids):
+        """
+        Bulk endpoints reject the entire request if any one ID is invalid
+        Bisect the rejected chunk to isolate invalid IDs and return results for the rest, as
+        :meth:`eveonline.providers.EveSwaggerProvider._post_valid` does
+        """
+        try:
+            data, _ = await self._request('POST', path, json=obj_ids)
+            return data
+        except ObjectNotFound as e:
+            if len(obj_ids) == 1:
+                return []
+            if await self._error_limit_low(ESI_ERROR_LIMIT_THRESHOLD):
+                raise e
+            if len(obj_ids) <= self.bisect_min_size:
+                parts = [[obj_id] for obj_id in obj_ids]
+            else:
+                middle = len(obj_ids) // 2
+                parts = [obj_ids[:middle], obj_ids[middle:]]
+            results = await asyncio.gather(*[self._post_valid(path, part) for part in parts])
+            return [result for part in results for result in part]
+
+    async def _post_chunked(self, path, obj_ids):
+        chunks = await asyncio.gather(*[self._post_valid(path, c) for c in chunked(obj_ids, self.bulk_chunk_size)])
+        return [result for chunk in chunks for result in chunk]
+
+    async def _get_names(self, obj_ids, category):
+        results = await self._post_chunked('/v2/universe/names/', list(set(int(obj_id) for obj_id in obj_ids)))
+        return {r['id']: r['name'] for r in results if r['category'] == category}
+
+    async def get_alliances(self, alliance_ids):
+        return await self._get_many(self.get_alliance, alliance_ids)
+
+    async def get_corporations(self, corp_ids):
+        return await self._get_many(self.get_corporation, corp_ids)
+
+    async def get_affiliations(self, character_ids):
+        affiliations = await self._post_chunked('/v1/characters/affiliation/',
+                                                list(set(int(obj_id) for obj_id in character_ids)))
+        return {
+            a['character_id']: {
+                'corporation_id': a['corporation_id'],
+                'alliance_id': a.get('alliance_id'),
+                'faction_id': a.get('faction_id'),
+            } for a in affiliations
+        }
+
+    async def get_characters(self, character_ids):
+        names = await self._get_names(character_ids, 'character')
+        affiliations = await self.get_affiliations(list(names))
+        return {
+            obj_id: Character(obj_id, names[obj_id], affiliation['corporation_id'])
+            for obj_id, affiliation in affiliations.items()
+        }
+
+    async def get_itemtypes(self, type_ids):
+        names = await self._get_names(type_ids, 'inventory_type')
+        return {obj_id: ItemType(obj_id, name) for obj_id, name in names.items()}
+
+    async def get_factions(self, faction_ids):
+        index = await self._faction_index()
+        faction_ids = set(int(obj_id) for obj_id in faction_ids)
+        return {
+            obj_id: Faction(obj_id, index[obj_id]['name'], index[obj_id]['description'])
+            for obj_id in faction_ids if obj_id in index
+        }
+
+
+class AsyncCachingProviderWrapper(CachingProviderWrapper):
+    """
+    Caches data from a wrapped asyncio provider
+    Shares the cache and statistics of :class:`eveonline.providers.CachingProviderWrapper`, running cache
+    operations in the default executor so slow cache backends don't block the event loop
+    The get_ methods are coroutines
+    """
+
+    @staticmethod
+    async def _in_executor(func, *args):
+        return await asyncio.get_event_loop().run_in_executor(None, func, *args)
+
+    async def close(self):
+        await self.provider.close()
+
+    def refresh(self, obj_class, obj_ids):
+        """
+        Retrieves stale objects again with the default synchronous provider, which shares this cache
+        Called from a background thread where the coroutine get_ methods can't be awaited
+        """
+        eve_provider_factory().refresh(obj_class, obj_ids)
+
+    async def _get_object(self, obj_class, obj_id, new=False):
+        type_name = obj_class.__name__.lower()
+        obj = None
+        if not new:
+            objs, expired, not_found = await self._in_executor(self.lookup, obj_class, [obj_id])
+            if int(obj_id) in not_found:
+                raise ObjectNotFound(obj_id, type_name)
+            obj = objs.get(int(obj_id))
+        if obj is None:
+            self.stats.incr(type_name, 'refresh' if new else 'miss')
+            try:
+                obj = await getattr(self.provider, 'get_%s' % type_name)(obj_id)
+            except ObjectNotFound:
+                await self._in_executor(self.store_not_found, obj_class, [obj_id])
+                raise
+            await self._in_executor(self.store, [obj])
+        return obj
+
+    async def _get_objects(self, obj_class, obj_ids, new=False):
+        type_name = obj_class.__name__.lower()
+        obj_ids = set(int(obj_id) for obj_id in obj_ids)
+        objs, not_found = {}, ()
+        if not new:
+            objs, expired, not_found = await self._in_executor(self.lookup, obj_class, obj_ids)
+        missing = [obj_id for obj_id in obj_ids if obj_id not in objs and obj_id not in not_found]
+        self.stats.incr(type_name, 'refresh' if new else 'miss', len(missing))
+        if missing:
+            fetched = await getattr(self.provider, 'get_%ss' % type_name)(missing)
+            await self._in_executor(self.store, list(fetched.values()))
+            # bulk methods omit IDs which don't exist
+            await self._in_executor(self.store_not_found, obj_class,
+                                    [obj_id for obj_id in missing if obj_id not in fetched])
+            objs.update(fetched)
+        return objs
+
+    async def get_affiliations(self, obj_ids):
+        return await self.provider.get_affiliations(obj_ids)
+
+    async def get_character(self, obj_id, new=False):
+        return await self._get_object(Character, obj_id, new=new)
+
+    async def get_corporation(self, obj_id, new=False):
+        return await self._get_object(Corporation, obj_id, new=new)
+
+    async def get_alliance(self, obj_id, new=False):
+        return await self._get_object(Alliance, obj_id, new=new)
+
+    async def get_itemtype(self, obj_id, new=False):
+        return await self._get_object(ItemType, obj_id, new=new)
+
+    async def get_faction(self, obj_id, new=False):
+        return await self._get_object(Faction, obj_id, new=new)
+
+    async def get_characters(self, obj_ids, new=False):
+        return await self._get_objects(Character, obj_ids, new=new)
+
+    async def get_corporations(self, obj_ids, new=False):
+        return await self._get_objects(Corporation, obj_ids, new=new)
+
+    async def get_alliances(self, obj_ids, new=False):
+        return await self._get_objects(Alliance, obj_ids, new=new)
+
+    async def get_itemtypes(self, obj_ids, new=False):
+        return await self._get_objects(ItemType, obj_ids, new=new)
+
+    async def get_factions(self, obj_ids, new=False):
+        return await self._get_objects(Faction, obj_ids, new=new)
+
+
+def async_eve_provider_factory(session=None):
+    """
+    Returns a caching asyncio provider
+    Sessions are bound to an event loop, so unlike :func:`eveonline.providers.eve_provider_factory` providers are not
+    shared: keep the provider for the life of the loop and close() it when done
+    """
+    return AsyncCachingProviderWrapper(AsyncEveSwaggerProvider(session=session))
@@ -0,0 +1,108 @@
+from __future__ import unicode_literals
+from django.core.management.base import BaseCommand, CommandError
+from eveonline.models import ItemType, Faction
+from eveonline.providers import SdeProvider, ItemType as ProviderItemType, Faction as ProviderFaction
+import os
+import sqlite3
+
+
+class Command(BaseCommand):
+    help = 'Loads item types and factions from a local copy of the EVE Online static data export'
+
+    # file names used by different releases of the YAML export
+    yaml_type_files = ('typeIDs.yaml', 'types.yaml')
+    yaml_faction_files = ('chrFactions.yaml', 'factions.yaml')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='SQLite conversion of the export, or directory of the extracted YAML export')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Models written per transaction, default settings.EVEONLINE_BULK_UPDATE_CHUNK_SIZE')
+        parser.add_argument('--unpublished', action='store_true', help='Also import types not available in game')
+        parser.add_argument('--language', default='en', help='Language of names read from the YAML export')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if os.path.isdir(path):
+            types, factions = self.read_yaml(path, options['language'], options['unpublished'])
+        elif os.path.isfile(path):
+            types, factions = self.read_sqlite(path, options['unpublished'])
+        else:
+            raise CommandError('%s does not exist' % path)
+
+        # nothing is looked up remotely while importing
+        provider = SdeProvider()
+        for model, objs in ((ItemType, types), (Faction, factions)):
+            counts = model.bulk_from_provider_objs(objs, provider=provider, batch_size=options['batch_size'])
+            self.stdout.write('%s: %s created, %s updated' % (model.__name__, counts['created'], counts['updated']))
+
+    @staticmethod
+    def read_sqlite(path, unpublished=False):
+        """
+        Reads the SQLite conversion of the export, streaming rows as they are imported
+        :return: tuple of iterables of item types and factions
+        """
+        try:
+            conn = sqlite3.connect(path)
+            tables = set(row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'"))
+        except sqlite3.DatabaseError as e:
+            raise CommandError('%s is not a SQLite database: %s' % (path, e))
+        for table in ('invTypes', 'chrFactions'):
+            if table not in tables:
+                raise CommandError('%s has no %s table' % (path, table))
+
+        def types():
+            query = 'SELECT typeID, typeName FROM invTypes'
+            if not unpublished:
+                query += ' WHERE published = 1'
+            for type_id, name in conn.execute(query):
+                yield ProviderItemType(type_id, name)
+
+        def factions():
+            for faction_id, name, description in conn.execute(
+                    'SELECT factionID, factionName, description FROM chrFactions'):
+                yield ProviderFaction(faction_id, name, description)
+
+        return types(), factions()
+
+    @classmethod
+    def read_yaml(cls, path, language='en', unpublished=False):
+        """
+        Reads the YAML export. Each file is parsed whole, so expect several hundred MB of memory use for item types.
+        :return: tuple of iterables of item types and factions
+        """
+        try:
+            import yaml
+        except ImportError:
+            raise CommandError('Reading the YAML export requires PyYAML: pip install pyyaml')
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+        def load(file_names):
+            for root, dirs, files in os.walk(path):
+                for file_name in file_names:
+                    if file_name in files:
+                        with open(os.path.join(root, file_name), 'rb') as f:
+                            return yaml.load(f, Loader=loader)
+            raise CommandError('No %s found in %s' % (' or '.join(file_names), path))
+
+        def localised(value):
+            # newer exports hold a dictionary of translations, older ones a single string
+            if isinstance(value, dict):
+                return value.get(language) or value.get('en')
+            return value
+
+        def types():
+            for type_id, data in load(cls.yaml_type_files).items():
+                if unpublished or data.get('published'):
+                    yield ProviderItemType(type_id, localised(data['name']))
+
+        def factions():
+            data = load(cls.yaml_faction_files)
+            if isinstance(data, dict):
+                for faction_id, faction in data.items():
+                    yield ProviderFaction(faction_id, localised(faction['nameID']),
+                                          localised(faction.get('descriptionID')))
+            else:
+                for faction in data:
+                    yield ProviderFaction(faction['factionID'], faction['factionName'], faction.get('description'))
+
+        return types(), factions()
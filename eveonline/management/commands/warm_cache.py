@@ -0,0 +1,23 @@
+from __future__ import unicode_literals
+from django.core.management.base import BaseCommand
+from eveonline.models import warm_provider_cache
+
+
+class Command(BaseCommand):
+    help = 'Loads the objects of all stored models into the provider cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('type_names', nargs='*', help='Object types to load, for instance alliance, default all')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='IDs per bulk call, default settings.EVEONLINE_BULK_UPDATE_CHUNK_SIZE')
+        parser.add_argument('--rate', type=int, default=None,
+                            help='Maximum objects per second, 0 for none, default settings.EVEONLINE_WARM_CACHE_RATE')
+
+    def handle(self, *args, **options):
+        def progress(type_name, done, total, rate):
+            self.stdout.write('%s: %s of %s, %.0f objects per second' % (type_name, done, total, rate))
+
+        loaded = warm_provider_cache(type_names=options['type_names'], batch_size=options['batch_size'],
+                                     max_rate=options['rate'], progress=progress)
+        for type_name, count in loaded.items():
+            self.stdout.write('Loaded %s %s objects' % (count, type_name))
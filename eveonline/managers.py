@@ -1 +1,41 @@
 from __future__ import unicode_literals
+from django.db import models
+from eveonline.models import prefetch_eve_entities
+
+
+class EveEntityQuerySet(models.QuerySet):
+    """
+    QuerySet able to resolve EVE entity fields of all results at once
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(EveEntityQuerySet, self).__init__(*args, **kwargs)
+        self._eve_prefetch_fields = None
+
+    def prefetch_eve_entities(self, *field_names):
+        """
+        Resolves EVE entity fields of all results with one bulk provider call per entity type when evaluated
+        :param field_names: names of fields to resolve, all EVE entity fields if omitted
+        """
+        clone = self._clone()
+        clone._eve_prefetch_fields = field_names
+        return clone
+
+    def _clone(self, *args, **kwargs):
+        clone = super(EveEntityQuerySet, self)._clone(*args, **kwargs)
+        clone._eve_prefetch_fields = self._eve_prefetch_fields
+        return clone
+
+    def _fetch_all(self):
+        prefetch = self._result_cache is None and self._eve_prefetch_fields is not None
+        super(EveEntityQuerySet, self)._fetch_all()
+        if prefetch:
+            prefetch_eve_entities([r for r in self._result_cache if isinstance(r, models.Model)],
+                                  *self._eve_prefetch_fields)
+
+
+class EveEntityManager(models.Manager.from_queryset(EveEntityQuerySet)):
+    """
+    Manager for models with EVE entity fields, providing prefetch_eve_entities()
+    """
+    pass
@@ -1,10 +1,22 @@
 from __future__ import unicode_literals
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import class_prepared
+from django.dispatch import receiver
 from django.utils.encoding import python_2_unicode_compatible
 from django.core import validators
-from eveonline.providers import eve_provider_factory, ObjectNotFound, Character as ProviderCharacter, \
-    Corporation as ProviderCorporation, Alliance as ProviderAlliance, ItemType as ProviderItemType, \
-    Faction as ProviderFaction
+from django.utils import timezone
+from eveonline.app_settings import SNAPSHOT_ENTITIES, BULK_UPDATE_CHUNK_SIZE, WARM_CACHE_RATE, WARM_CACHE_HOT_KEYS
+from eveonline.providers import eve_provider_factory, ObjectNotFound, prefetch_related, chunked, background_requests, \
+    EntityProxy, Entity, \
+    Character as ProviderCharacter, Corporation as ProviderCorporation, Alliance as ProviderAlliance, \
+    ItemType as ProviderItemType, Faction as ProviderFaction
+from collections import defaultdict
+from functools import reduce
+from itertools import chain
+import logging
+import time
+
+logger = logging.getLogger(__name__)
 
 
 class EveEntityValidator(validators.BaseValidator):
@@ -12,14 +24,22 @@ class EveEntityValidator(validators.BaseValidator):
     Ensures provided ID is valid for expected EVE entity type
     """
 
-    def compare(self, obj_id, expected_type):
+    message = 'No %(limit_value)s found with ID %(show_value)s.'
+    code = 'not_found'
+
+    def __init__(self, expected_type, message=None):
+        # the type name rather than the class, which django would call as a lazy limit
+        super(EveEntityValidator, self).__init__(expected_type.__name__.lower(), message=message)
+
+    def compare(self, obj_id, type_name):
+        # BaseValidator raises when this is true
         try:
-            return bool(getattr(eve_provider_factory(), 'get_%s' % expected_type.__class__.__name__.lower())(obj_id))
+            return not getattr(eve_provider_factory(), 'get_%s' % type_name)(obj_id)
         except ObjectNotFound:
-            return False
+            return True
 
     def clean(self, obj):
-        return obj.id
+        return int(obj)
 
 
 class EveEntityField(models.BigIntegerField):
@@ -32,12 +52,19 @@ class EveEntityField(models.BigIntegerField):
 
     @classmethod
     def _get_object(cls, object_id):
-        return getattr(eve_provider_factory(), 'get_%s' % cls.object_class.__class__.__name__.lower())(object_id)
+        # retrieved on first attribute access so loading rows doesn't cost an API call each
+        return EntityProxy(cls.object_class, object_id)
 
     @property
     def validators(self):
-        return super(EveEntityField, self).validators.append(
-            [validators.MinValueValidator(1), EveEntityValidator(self.object_class)])
+        return super(EveEntityField, self).validators + [
+            validators.MinValueValidator(1), EveEntityValidator(self.object_class)]
+
+    def run_validators(self, value):
+        # validators compare the ID rather than the entity returned by to_python
+        if value is not None:
+            value = int(value)
+        super(EveEntityField, self).run_validators(value)
 
     def from_db_value(self, value, *args):
         if value is None:
@@ -45,7 +72,7 @@ class EveEntityField(models.BigIntegerField):
         return self._get_object(value)
 
     def to_python(self, value):
-        if isinstance(value, self.object_class):
+        if isinstance(value, (self.object_class, EntityProxy)):
             return value
         elif value is None:
             return None
@@ -53,6 +80,39 @@ class EveEntityField(models.BigIntegerField):
             return self._get_object(value)
 
 
+def prefetch_eve_entities(instances, *field_names, **kwargs):
+    """
+    Resolves the EVE entity fields of many model instances with one bulk provider call per entity type
+    :param instances: iterable of model instances
+    :param field_names: names of :class:`eveonline.models.EveEntityField` fields to resolve, all if omitted
+    :param provider: :class:`eveonline.providers.EveProvider` keyword argument, defaults to the default provider
+    :return: list of the model instances
+    """
+    provider = kwargs.pop('provider', None) or eve_provider_factory()
+    instances = list(instances)
+    if not instances:
+        return instances
+    opts = instances[0]._meta
+    if field_names:
+        fields = [opts.get_field(name) for name in field_names]
+    else:
+        fields = [field for field in opts.fields if isinstance(field, EveEntityField)]
+
+    proxies = defaultdict(list)
+    for instance in instances:
+        for field in fields:
+            value = getattr(instance, field.attname)
+            if isinstance(value, EntityProxy) and not value.resolved:
+                proxies[field.object_class].append(value)
+
+    for obj_class, class_proxies in proxies.items():
+        objs = getattr(provider, 'get_%ss' % obj_class.__name__.lower())(set(p.id for p in class_proxies))
+        for proxy in class_proxies:
+            if int(proxy.id) in objs:
+                proxy.resolve(objs[int(proxy.id)])
+    return instances
+
+
 class CharacterField(EveEntityField):
     object_class = ProviderCharacter
 
@@ -73,7 +133,7 @@ class FactionField(EveEntityField):
     object_class = ProviderFaction
 
 
-class AllianceSnapshotMixin(object):
+class AllianceSnapshotMixin(models.Model):
     """
     Provides pseudo-FK behaviour to external API alliance data
     Snapshots alliance_id and provides a alliance property
@@ -81,8 +141,13 @@ class AllianceSnapshotMixin(object):
     alliance_id = models.PositiveIntegerField()
     alliance_name = models.CharField(max_length=30)
 
+    class Meta:
+        abstract = True
+
     @property
     def alliance(self):
+        if SNAPSHOT_ENTITIES:
+            return EntityProxy(ProviderAlliance, self.alliance_id, name=self.alliance_name)
         try:
             return eve_provider_factory().get_alliance(self.alliance_id)
         except ObjectNotFound:
@@ -103,6 +168,9 @@ class NullAllianceSnapshotMixin(AllianceSnapshotMixin):
     alliance_id = models.PositiveIntegerField(blank=True, null=True)
     alliance_name = models.CharField(max_length=30, blank=True, null=True)
 
+    class Meta:
+        abstract = True
+
     @property
     def alliance(self):
         if self.alliance_id and self.alliance_name:
@@ -112,13 +180,14 @@ class NullAllianceSnapshotMixin(AllianceSnapshotMixin):
     @alliance.setter
     def alliance(self, obj):
         if obj:
-            super(NullAllianceSnapshotMixin, self).alliance = obj
+            # super() proxies can't assign properties, so call the parent setter directly
+            AllianceSnapshotMixin.alliance.fset(self, obj)
         else:
             self.alliance_id = None
             self.alliance_name = None
 
 
-class FactionSnapshotMixin(object):
+class FactionSnapshotMixin(models.Model):
     """
     Provides pseudo-FK behaviour to external API faction data
     Snapshots faction_id and provides a faction property
@@ -126,8 +195,13 @@ class FactionSnapshotMixin(object):
     faction_id = models.PositiveIntegerField()
     faction_name = models.CharField(max_length=30)
 
+    class Meta:
+        abstract = True
+
     @property
     def faction(self):
+        if SNAPSHOT_ENTITIES:
+            return EntityProxy(ProviderFaction, self.faction_id, name=self.faction_name)
         try:
             return eve_provider_factory().get_faction(self.faction_id)
         except ObjectNotFound:
@@ -147,6 +221,9 @@ class NullFactionSnapshotMixin(FactionSnapshotMixin):
     faction_id = models.PositiveIntegerField(blank=True, null=True)
     faction_name = models.CharField(max_length=30, blank=True, null=True)
 
+    class Meta:
+        abstract = True
+
     @property
     def faction(self):
         if self.faction_id and self.faction_name:
@@ -157,7 +234,7 @@ class NullFactionSnapshotMixin(FactionSnapshotMixin):
     @faction.setter
     def faction(self, obj):
         if obj:
-            super(NullFactionSnapshotMixin, self).faction = obj
+            FactionSnapshotMixin.faction.fset(self, obj)
         else:
             self.faction_id = None
             self.faction_name = None
@@ -171,12 +248,27 @@ class CorporationSnapshotMixin(NullAllianceSnapshotMixin, NullFactionSnapshotMix
     corporation_id = models.PositiveIntegerField()
     corporation_name = models.CharField(max_length=30)
 
+    class Meta:
+        abstract = True
+
     @property
     def corporation(self):
+        if SNAPSHOT_ENTITIES:
+            # relations are served as snapshotted, without a null alliance or faction resolving the corporation
+            return EntityProxy(
+                ProviderCorporation,
+                self.corporation_id,
+                name=self.corporation_name,
+                alliance_id=self.alliance_id,
+                alliance=self.alliance or Entity(None, None),
+                faction_id=self.faction_id,
+                faction=self.faction or Entity(None, None),
+            )
         try:
             corp = eve_provider_factory().get_corporation(self.corporation_id)
             corp.alliance = self.alliance
             corp.faction = self.faction
+            return corp
         except ObjectNotFound:
             return None
 
@@ -185,6 +277,7 @@ class CorporationSnapshotMixin(NullAllianceSnapshotMixin, NullFactionSnapshotMix
         self.corporation_id = obj.id
         self.corporation_name = obj.name
         self.alliance = obj.alliance
+        self.faction = obj.faction
 
 
 class CharacterSnapshotMixin(CorporationSnapshotMixin):
@@ -195,11 +288,26 @@ class CharacterSnapshotMixin(CorporationSnapshotMixin):
     character_id = models.PositiveIntegerField()
     character_name = models.CharField(max_length=37)
 
+    class Meta:
+        abstract = True
+
     @property
     def character(self):
+        if SNAPSHOT_ENTITIES:
+            corp = self.corporation
+            return EntityProxy(
+                ProviderCharacter,
+                self.character_id,
+                name=self.character_name,
+                corporation_id=self.corporation_id,
+                corporation=corp,
+                alliance=corp.alliance,
+                faction=corp.faction,
+            )
         try:
             char = eve_provider_factory().get_character(self.character_id)
             char.corporation = self.corporation
+            return char
         except ObjectNotFound:
             return None
 
@@ -210,13 +318,101 @@ class CharacterSnapshotMixin(CorporationSnapshotMixin):
         self.corporation = obj.corporation
 
 
+def refresh_snapshots(queryset, provider=None):
+    """
+    Updates the snapshotted names of many rows with one bulk provider call per snapshotted type
+    Snapshotted relations are left untouched; only names which changed are written, one UPDATE per changed object
+    :param queryset: QuerySet of a model using the snapshot mixins
+    :param provider: :class:`eveonline.providers.EveProvider`
+    :return: number of names updated
+    """
+    provider = provider or eve_provider_factory()
+    snapshots = (
+        ('character', CharacterSnapshotMixin),
+        ('corporation', CorporationSnapshotMixin),
+        ('alliance', AllianceSnapshotMixin),
+        ('faction', FactionSnapshotMixin),
+    )
+    updated = 0
+    with transaction.atomic():
+        for type_name, mixin in snapshots:
+            if not issubclass(queryset.model, mixin):
+                continue
+            id_field, name_field = '%s_id' % type_name, '%s_name' % type_name
+            stored = set(queryset.filter(**{'%s__isnull' % id_field: False}).values_list(id_field, name_field))
+            objs = getattr(provider, 'get_%ss' % type_name)(set(obj_id for obj_id, name in stored))
+            for obj_id in set(obj_id for obj_id, name in stored if obj_id in objs and objs[obj_id].name != name):
+                updated += queryset.filter(**{id_field: obj_id}).exclude(**{name_field: objs[obj_id].name}).update(
+                    **{name_field: objs[obj_id].name})
+    return updated
+
+
+def warm_provider_cache(type_names=None, provider=None, batch_size=None, max_rate=None, hot_keys=None, progress=None):
+    """
+    Loads the objects of all stored models into the provider cache with bulk provider calls, for instance after the
+    cache was cleared. Objects already cached are not retrieved again.
+    :param type_names: object types to load, for instance ['alliance', 'corporation'], defaults to all
+    :param provider: :class:`eveonline.providers.CachingProviderWrapper`, defaults to the default provider
+    :param batch_size: IDs per bulk call, defaults to settings.EVEONLINE_BULK_UPDATE_CHUNK_SIZE
+    :param max_rate: maximum objects loaded per second, defaults to settings.EVEONLINE_WARM_CACHE_RATE, 0 for no limit
+    :param hot_keys: cache key names such as 'alliance__99000006' to load before the stored models, defaults to
+    settings.EVEONLINE_WARM_CACHE_HOT_KEYS
+    :param progress: callable receiving type name, objects done, objects total and objects per second after each batch
+    :return: dict of type name: number of objects loaded
+    """
+    provider = provider or eve_provider_factory()
+    batch_size = batch_size or BULK_UPDATE_CHUNK_SIZE
+    max_rate = WARM_CACHE_RATE if max_rate is None else max_rate
+    model_classes = [Faction, Alliance, Corporation, Character, ItemType]
+    if type_names:
+        model_classes = [model for model in model_classes if model.__name__.lower() in type_names]
+
+    hot_ids = defaultdict(list)
+    for key in WARM_CACHE_HOT_KEYS if hot_keys is None else hot_keys:
+        type_name, obj_id = key.split('__')
+        hot_ids[type_name].append(int(obj_id))
+
+    loaded = {}
+    start = time.time()
+    done = 0
+    with background_requests():
+        for model in model_classes:
+            type_name = model.__name__.lower()
+            total = len(hot_ids[type_name]) + model.objects.count()
+            loaded[type_name] = 0
+            type_done = 0
+            # hot keys go first
+            ids = chain(hot_ids[type_name], model.objects.order_by('id').values_list('id', flat=True).iterator())
+            for obj_ids in chunked(ids, batch_size):
+                loaded[type_name] += len(getattr(provider, 'get_%ss' % type_name)(obj_ids))
+                type_done += len(obj_ids)
+                done += len(obj_ids)
+                if max_rate:
+                    # hold back until the average rate is within the limit
+                    delay = done / float(max_rate) - (time.time() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+                rate = done / max(time.time() - start, 0.001)
+                logger.info('Warming %s cache: %s of %s, %.0f objects per second', type_name, type_done, total, rate)
+                if progress:
+                    progress(type_name, type_done, total, rate)
+    return loaded
+
+
 @python_2_unicode_compatible
 class BaseEntity(models.Model):
     """
     Abstract base class for EVE Online objects.
     """
-    id = models.PositiveIntegerField(unique=True)
+    id = models.PositiveIntegerField(primary_key=True)
     name = models.CharField(unique=True, max_length=37)
+    last_updated = models.DateTimeField(auto_now=True, db_index=True)
+
+    # provider object class this model stores
+    provider_class = None
+    # field name:dotted provider object attribute path, for fields whose source can't be worked out from the
+    # field name, or None to never map the field
+    provider_attribute_map = {}
 
     class Meta:
         abstract = True
@@ -224,6 +420,31 @@ class BaseEntity(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def compile_provider_accessors(cls):
+        """
+        Works out which provider object attributes supply each field, once per model
+        Field names are matched to provider attributes directly ('corporation_id'), or split into a related object and
+        its attribute ('alliance_name' is obj.alliance.name)
+        :return: list of tuples of (field_name, tuple of attribute names to follow)
+        """
+        accessors = []
+        for field in cls._meta.fields:
+            if field.name in cls.provider_attribute_map:
+                path = cls.provider_attribute_map[field.name]
+                if path:
+                    accessors.append((field.name, tuple(path.split('.'))))
+            elif hasattr(cls.provider_class, field.name):
+                accessors.append((field.name, (field.name,)))
+            else:
+                chain = field.name.split('_')
+                for index in range(len(chain) - 1, 0, -1):
+                    related = '_'.join(chain[:index])
+                    if hasattr(cls.provider_class, related):
+                        accessors.append((field.name, (related, '_'.join(chain[index:]))))
+                        break
+        return accessors
+
     @classmethod
     def map_obj_attributes(cls, obj):
         """
@@ -231,27 +452,10 @@ class BaseEntity(models.Model):
         :param obj: :class:`eveonline.providers.Entity`
         :return: Dictionary of attribute_name:value
         """
-        fields = [field.name for field in cls._meta.fields]
         values = {}
-        for f in fields:
+        for field_name, path in cls._provider_accessors:
             try:
-                # iterate over field names and get data from object
-                chain = f.split('_')
-                attribute = None
-                index = 0
-                while index < len(chain):
-                    item = chain[index]
-                    try:
-                        # if we're lucky this is a direct mapping, like 'id' or 'name'
-                        attribute = getattr(obj, item)
-                    except AttributeError:
-                        # attributes with underscores in their name such as executor_corporation will not map directly
-                        # test-join neighbouring attributes to see if we can find what we're looking for
-                        right_item = '_'.join([chain[index], chain[index + 1]])
-                        attribute = getattr(obj, right_item)
-                        index += 1  # skip getting the next item because we had to join it to the current
-                    index += 1
-                values[f] = attribute
+                values[field_name] = reduce(getattr, path, obj)
             except AttributeError:
                 # obj does not have this attribute, so let the calling function decide how to handle missing data
                 pass
@@ -275,7 +479,7 @@ class BaseEntity(models.Model):
         :return: :class:`eveonline.models.BaseEntity` or subclass
         """
         provider = provider or eve_provider_factory()
-        obj = (provider.get_character(self.id))
+        obj = getattr(provider, 'get_%s' % self.__class__.__name__.lower())(self.id)
         attr_dict = self.map_obj_attributes(obj)
         for attr, value in attr_dict.items():
             setattr(self, attr, value)
@@ -283,19 +487,173 @@ class BaseEntity(models.Model):
             self.save()
         return self
 
+    @classmethod
+    def bulk_refresh(cls, obj_ids, provider=None):
+        """
+        Updates many models from provider objects retrieved in bulk, only writing those which changed
+        :param obj_ids: IDs of models to update
+        :param provider: :class:`eveonline.providers.EveProvider`
+        :return: Dictionary of counts of 'changed', 'unchanged' and 'missing' (not found by the provider) models
+        """
+        provider = provider or eve_provider_factory()
+        instances = {instance.id: instance for instance in cls.objects.filter(id__in=list(obj_ids))}
+        objs = getattr(provider, 'get_%ss' % cls.__name__.lower())(list(instances))
+        # resolve relations together rather than one at a time while mapping
+        prefetch_related(objs.values(), provider=provider)
+
+        changed = []
+        changed_fields = set()
+        for obj_id, obj in objs.items():
+            instance = instances[obj_id]
+            diff = {attr: value for attr, value in cls.map_obj_attributes(obj).items()
+                    if getattr(instance, attr) != value}
+            if diff:
+                for attr, value in diff.items():
+                    setattr(instance, attr, value)
+                changed.append(instance)
+                changed_fields.update(diff)
+        cls.bulk_save(changed, changed_fields)
+        # unchanged models were still confirmed current
+        changed_ids = set(instance.id for instance in changed)
+        unchanged = [obj_id for obj_id in objs if obj_id not in changed_ids]
+        if unchanged:
+            cls.objects.filter(id__in=unchanged).update(last_updated=timezone.now())
+        return {
+            'changed': len(changed),
+            'unchanged': len(objs) - len(changed),
+            'missing': len(instances) - len(objs),
+        }
+
+    @classmethod
+    def bulk_save(cls, instances, fields):
+        """
+        Saves changes to many existing models in one transaction, marking them as updated now
+        Uses bulk_update where available, otherwise issues one UPDATE per distinct set of values
+        :param instances: list of models to save
+        :param fields: names of fields to write
+        """
+        if not instances:
+            return
+        # auto_now only applies to save()
+        now = timezone.now()
+        for instance in instances:
+            instance.last_updated = now
+        fields = sorted(set(fields) | {'last_updated'})
+        with transaction.atomic():
+            if hasattr(cls.objects, 'bulk_update'):
+                cls.objects.bulk_update(instances, fields)
+            else:
+                groups = defaultdict(list)
+                for instance in instances:
+                    groups[tuple(getattr(instance, f) for f in fields)].append(instance.id)
+                for values, ids in groups.items():
+                    cls.objects.filter(id__in=ids).update(**dict(zip(fields, values)))
+
+    @classmethod
+    def bulk_from_provider_objs(cls, objs, provider=None, batch_size=None):
+        """
+        Creates or updates models from many provider objects, saving each batch in one transaction
+        The iterable is consumed a batch at a time so memory use stays flat however many objects are imported
+        :param objs: iterable of :class:`eveonline.providers.Entity`, or of IDs to retrieve from the provider
+        :param provider: :class:`eveonline.providers.EveProvider`, used to retrieve IDs and related objects
+        :param batch_size: number of models written per transaction,
+        defaults to settings.EVEONLINE_BULK_UPDATE_CHUNK_SIZE
+        :return: Dictionary of counts of 'created', 'updated' and 'missing' (IDs not found by the provider) models
+        """
+        provider = provider or eve_provider_factory()
+        counts = {'created': 0, 'updated': 0, 'missing': 0}
+        for batch in chunked(objs, batch_size or BULK_UPDATE_CHUNK_SIZE):
+            obj_ids = [item for item in batch if not isinstance(item, (Entity, EntityProxy))]
+            batch = [item for item in batch if isinstance(item, (Entity, EntityProxy))]
+            if obj_ids:
+                found = getattr(provider, 'get_%ss' % cls.__name__.lower())(obj_ids)
+                counts['missing'] += len(set(int(obj_id) for obj_id in obj_ids)) - len(found)
+                batch.extend(found.values())
+            prefetch_related(batch, provider=provider)
+
+            # later duplicates within a batch win, as they would saving one at a time
+            values = {int(obj.id): cls.map_obj_attributes(obj) for obj in batch}
+            existing = set(cls.objects.filter(id__in=list(values)).values_list('id', flat=True))
+            created = [cls(**attrs) for obj_id, attrs in values.items() if obj_id not in existing]
+            updated = [cls(**attrs) for obj_id, attrs in values.items() if obj_id in existing]
+            with transaction.atomic():
+                cls.objects.bulk_create(created)
+                cls.bulk_save(updated, set(f for attrs in values.values() for f in attrs if f != 'id'))
+            counts['created'] += len(created)
+            counts['updated'] += len(updated)
+        return counts
+
+
+@receiver(class_prepared)
+def compile_provider_accessors(sender, **kwargs):
+    if issubclass(sender, BaseEntity):
+        sender._provider_accessors = sender.compile_provider_accessors()
+
 
 class Character(CorporationSnapshotMixin, BaseEntity):
     """
     Model representing a character from EVE Online
     """
-    pass
+    provider_class = ProviderCharacter
+
+    @classmethod
+    def refresh_affiliations(cls, obj_ids, provider=None):
+        """
+        Updates the corporation, alliance and faction snapshots of many characters from affiliation data
+        Only characters whose affiliations changed have their relations resolved and are written
+        :param obj_ids: IDs of models to update
+        :param provider: :class:`eveonline.providers.EveProvider`
+        :return: Dictionary of counts of 'changed', 'unchanged' and 'missing' (not found by the provider) models
+        """
+        provider = provider or eve_provider_factory()
+        stored = {
+            row['id']: (row['corporation_id'], row['alliance_id'], row['faction_id'])
+            for row in cls.objects.filter(id__in=list(obj_ids)).values(
+                'id', 'corporation_id', 'alliance_id', 'faction_id')
+        }
+        affiliations = provider.get_affiliations(list(stored))
+
+        # characters moving together share new values, so group them for one UPDATE per group
+        changed = defaultdict(list)
+        for obj_id, affiliation in affiliations.items():
+            values = (affiliation['corporation_id'], affiliation['alliance_id'], affiliation['faction_id'])
+            if values != stored[obj_id]:
+                changed[values].append(obj_id)
+
+        missing = len(stored) - len(affiliations)
+        if changed:
+            corps = provider.get_corporations(set(values[0] for values in changed))
+            alliances = provider.get_alliances(set(values[1] for values in changed if values[1]))
+            factions = provider.get_factions(set(values[2] for values in changed if values[2]))
+            with transaction.atomic():
+                for (corp_id, alliance_id, faction_id), ids in list(changed.items()):
+                    if corp_id not in corps:
+                        missing += len(ids)
+                        del changed[(corp_id, alliance_id, faction_id)]
+                        continue
+                    cls.objects.filter(id__in=ids).update(
+                        corporation_id=corp_id,
+                        corporation_name=corps[corp_id].name,
+                        alliance_id=alliance_id if alliance_id in alliances else None,
+                        alliance_name=alliances[alliance_id].name if alliance_id in alliances else None,
+                        faction_id=faction_id if faction_id in factions else None,
+                        faction_name=factions[faction_id].name if faction_id in factions else None,
+                    )
+        changed_count = sum(len(ids) for ids in changed.values())
+        return {
+            'changed': changed_count,
+            'unchanged': len(stored) - missing - changed_count,
+            'missing': missing,
+        }
 
 
 class Corporation(NullAllianceSnapshotMixin, NullFactionSnapshotMixin, BaseEntity):
     """
     Model representing a corporation from EVE Online
     """
+    provider_class = ProviderCorporation
     members = models.PositiveIntegerField(help_text="Number of member characters")
+    ceo_id = models.PositiveIntegerField(blank=True, null=True)
     ticker = models.CharField(unique=True, max_length=5)
 
     @property
@@ -307,7 +665,9 @@ class Alliance(BaseEntity):
     """
     Model representing an alliance from EVE Online
     """
+    provider_class = ProviderAlliance
     ticker = models.CharField(unique=True, max_length=5)
+    executor_corporation_id = models.PositiveIntegerField(blank=True, null=True)
 
     @property
     def formatted_ticker(self):
@@ -318,11 +678,14 @@ class ItemType(BaseEntity):
     """
     Model representing an item type from EVE Online
     """
-    pass
+    provider_class = ProviderItemType
+    # type names are longer than those of characters and not unique
+    name = models.CharField(max_length=100, db_index=True)
 
 
 class Faction(BaseEntity):
     """
     Model representing a faction from EVE Online
     """
-    description = models.CharField(blank=True, null=True)
+    provider_class = ProviderFaction
+    description = models.TextField(blank=True, null=True)
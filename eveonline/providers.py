@@ -1,11 +1,28 @@
 from __future__ import unicode_literals
 from django.utils.encoding import python_2_unicode_compatible
 from esi.clients import esi_client_factory
-from eveonline.app_settings import OBJ_CACHE_DURATION, DEFAULT_PROVIDER
+from eveonline.app_settings import OBJ_CACHE_DURATION, DEFAULT_PROVIDER, LOCAL_CACHE_MAX_ENTRIES, \
+    LOCAL_CACHE_DURATIONS, MAX_CONCURRENCY, SDE_PROVIDER, DATABASE_PROVIDER, DATABASE_MAX_AGES, \
+    FAILOVER_ERROR_THRESHOLD, FAILOVER_COOLDOWN, ESI_ERROR_LIMIT_THRESHOLD, ETAG_RETENTION, SINGLE_FLIGHT_TIMEOUT, \
+    STALE_DURATIONS, STALE_REFRESH, NEGATIVE_CACHE_DURATION, PERSISTENT_CACHE_PATH
 from django.core.cache import cache
-from bravado.exception import HTTPNotFound, HTTPUnprocessableEntity
+from django.db import connections, transaction, DatabaseError
+from django.utils import timezone
+from bravado.exception import HTTPError, HTTPNotFound, HTTPUnprocessableEntity
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from email.utils import parsedate_tz, mktime_tz
+import bisect
+import copy
 import evelink
+import json
 import logging
+import os
+import sqlite3
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -20,8 +37,30 @@ class ObjectNotFound(Exception):
         return '%s with ID %s not found.' % (self.type, self.id)
 
 
+# bump whenever the compact form of any entity changes, so previously cached objects are discarded
+ENTITY_SCHEMA_VERSION = 1
+
+
+def _restore_entity(data):
+    """
+    Unpickles an entity from its compact form
+    Data from another schema version is discarded, so caches treat it as a miss rather than failing
+    """
+    try:
+        return from_compact(data)
+    except ValueError:
+        return None
+
+
 @python_2_unicode_compatible
 class Entity(object):
+    __slots__ = ('id', 'name', '_provider')
+
+    # identifies the class in the compact form
+    compact_type = 0
+    # attributes making up the compact form, in the order accepted by __init__
+    compact_fields = ('id', 'name')
+
     def __init__(self, obj_id, name, provider=None):
         self.id = obj_id
         self.name = name
@@ -34,23 +73,26 @@ class Entity(object):
         return int(self.id)
 
     def __repr__(self):
-        return "<{} ({}): {}>".format(self.__class__.__name__, self.obj_id, self.name)
+        return "<{} ({}): {}>".format(self.__class__.__name__, self.id, self.name)
 
     def __bool__(self):
-        return bool(self.obj_id)
+        return bool(self.id)
 
     def __eq__(self, other):
-        return int(self) == int(other) and str(self) == str(other)
+        try:
+            return int(self) == int(other) and str(self) == str(other)
+        except (TypeError, ValueError):
+            # not an entity or ID, such as the empty values django checks fields against
+            return False
 
-    def __setstate__(self, state):
-        self.__dict__.update(state)
-        self._provider = None
+    def __reduce__(self):
+        return _restore_entity, (self.to_compact(),)
 
-    def __getstate__(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-        }
+    def to_compact(self):
+        """
+        :return: tuple of schema version, type code and attribute values, containing only builtin types
+        """
+        return (ENTITY_SCHEMA_VERSION, self.compact_type) + tuple(getattr(self, f) for f in self.compact_fields)
 
     @property
     def provider(self):
@@ -63,6 +105,11 @@ class Entity(object):
 
 
 class Corporation(Entity):
+    __slots__ = ('ticker', 'ceo_id', 'members', 'alliance_id', 'faction_id', '_alliance', '_ceo', '_faction')
+
+    compact_type = 1
+    compact_fields = ('id', 'name', 'ticker', 'ceo_id', 'members', 'alliance_id', 'faction_id')
+
     def __init__(self, obj_id, name, ticker, ceo_id, members, alliance_id, faction_id, provider=None):
         super(Corporation, self).__init__(obj_id, name, provider=provider)
         self.ticker = ticker
@@ -97,6 +144,13 @@ class Corporation(Entity):
             self._ceo = self.provider.get_character(self.ceo_id)
         return self._ceo
 
+    def prefetch(self):
+        """
+        Resolves the CEO, alliance and faction concurrently instead of on first access
+        """
+        map_concurrently(lambda attr: getattr(self, attr), ['ceo', 'alliance', 'faction'])
+        return self
+
     @property
     def faction(self):
         if self.faction_id:
@@ -114,25 +168,13 @@ class Corporation(Entity):
             self.faction_id = None
             self._faction = None
 
-    def __getstate__(self):
-        return super(Corporation, self).__getstate__().update(
-            {
-                'ticker': self.ticker,
-                'ceo_id': self.ceo_id,
-                'members': self.members,
-                'alliance_id': self.alliance_id,
-                'faction_id': self.faction_id,
-            }
-        )
 
-    def __setstate__(self, state):
-        super(Corporation, self).__setstate__(state)
-        self._alliance = None
-        self._ceo = None
-        self._faction = None
+class Alliance(Entity):
+    __slots__ = ('ticker', 'corporation_ids', 'executor_corporation_id', '_corps')
 
+    compact_type = 2
+    compact_fields = ('id', 'name', 'ticker', 'corporation_ids', 'executor_corporation_id')
 
-class Alliance(Entity):
     def __init__(self, obj_id, name, ticker, corp_ids, executor_corp_id, provider=None):
         super(Alliance, self).__init__(obj_id, name, provider=provider)
         self.ticker = ticker
@@ -147,29 +189,33 @@ class Alliance(Entity):
             self._corps[corp_id].alliance = self
         return self._corps[corp_id]
 
+    def prefetch_corporations(self):
+        """
+        Resolves all member corporations in one bulk provider call instead of one call each
+        """
+        missing = [corp_id for corp_id in self.corporation_ids if corp_id not in self._corps]
+        if missing:
+            for corp_id, corp in self.provider.get_corporations(missing).items():
+                corp.alliance = self
+                self._corps[corp_id] = corp
+        return self
+
     @property
     def corporations(self):
+        self.prefetch_corporations()
         return sorted([self.corporation(corp_id) for corp_id in self.corporation_ids], key=lambda x: x.name)
 
     @property
     def executor_corporation(self):
         return self.corporation(self.executor_corporation_id)
 
-    def __getstate__(self):
-        return super(Alliance, self).__getstate__().update(
-            {
-                'ticker': self.ticker,
-                'corporation_ids': self.corporation_ids,
-                'executor_corporation_id': self.executor_corporation_id,
-            }
-        )
 
-    def __setstate__(self, state):
-        super(Alliance, self).__setstate__(state)
-        self._corps = {}
+class Character(Entity):
+    __slots__ = ('corporation_id', '_corporation')
 
+    compact_type = 3
+    compact_fields = ('id', 'name', 'corporation_id')
 
-class Character(Entity):
     def __init__(self, obj_id, name, corp_id, provider=None):
         super(Character, self).__init__(obj_id, name, provider=provider)
         self.corporation_id = corp_id
@@ -194,34 +240,160 @@ class Character(Entity):
     def faction(self):
         return self.corporation.faction
 
-    def __getstate__(self):
-        return super(Character, self).__getstate__().update(
-            {
-                'corporation_id': self.corporation_id,
-                'alliance_id': self.alliance_id,
-            }
-        )
-
-    def __setstate__(self, state):
-        super(Character, self).__setstate__(state)
-        self._corporation = None
+    def prefetch(self):
+        """
+        Resolves the corporation, then its CEO, alliance and faction concurrently
+        """
+        self.corporation.prefetch()
+        return self
 
 
 class ItemType(Entity):
+    __slots__ = ()
+
+    compact_type = 4
+
     def __init__(self, type_id, name, provider=None):
         super(ItemType, self).__init__(type_id, name, provider=provider)
 
 
 class Faction(Entity):
+    __slots__ = ('description',)
+
+    compact_type = 5
+    compact_fields = ('id', 'name', 'description')
+
     def __init__(self, faction_id, name, description, provider=None):
         super(Faction, self).__init__(faction_id, name, provider=provider)
         self.description = description
 
-    def __getstate__(self):
-        return super(Faction, self).__getstate__().update({'description': self.description})
+
+_compact_types = {cls.compact_type: cls for cls in (Entity, Corporation, Alliance, Character, ItemType, Faction)}
+
+
+def from_compact(data):
+    """
+    Rebuilds an entity from the output of :meth:`eveonline.providers.Entity.to_compact`
+    :raises ValueError: if the data is from another schema version or of an unknown type
+    :return: :class:`eveonline.providers.Entity` subclass
+    """
+    if not data or data[0] != ENTITY_SCHEMA_VERSION or data[1] not in _compact_types:
+        raise ValueError('Incompatible entity data')
+    return _compact_types[data[1]](*data[2:])
+
+
+def prefetch_related(objs, provider=None):
+    """
+    Resolves the relations of many provider objects with one bulk call per related type
+    Characters are given their corporation, and corporations (including those of characters) their alliance and faction
+    :param objs: iterable of :class:`eveonline.providers.Entity`
+    :param provider: :class:`eveonline.providers.EveProvider`, defaults to that of the objects
+    """
+    objs = list(objs)
+    if not objs:
+        return
+    provider = provider or objs[0].provider
+
+    chars = [obj for obj in objs if isinstance(obj, Character)]
+    if chars:
+        corps = provider.get_corporations(set(char.corporation_id for char in chars))
+        for char in chars:
+            if char.corporation_id in corps:
+                char.corporation = corps[char.corporation_id]
+        objs.extend(corps.values())
+
+    corps = [obj for obj in objs if isinstance(obj, Corporation)]
+    if corps:
+        alliances = provider.get_alliances(set(corp.alliance_id for corp in corps if corp.alliance_id))
+        factions = provider.get_factions(set(corp.faction_id for corp in corps if corp.faction_id))
+        for corp in corps:
+            if corp.alliance_id in alliances:
+                corp.alliance = alliances[corp.alliance_id]
+            if corp.faction_id in factions:
+                corp.faction = factions[corp.faction_id]
+
+
+def _restore_proxy(obj_class, obj_id, known):
+    return EntityProxy(obj_class, obj_id, **known)
+
+
+@python_2_unicode_compatible
+class EntityProxy(object):
+    """
+    Stands in for a provider object, only retrieving it when an attribute it wasn't given is first accessed
+    """
+
+    __slots__ = ('_obj_class', 'id', '_known', '_obj')
+
+    def __init__(self, obj_class, obj_id, **attributes):
+        """
+        :param obj_class: :class:`eveonline.providers.Entity` subclass being stood in for
+        :param obj_id: ID of the object
+        :param attributes: attribute values already known, such as a stored name, served without retrieval
+        """
+        object.__setattr__(self, '_obj_class', obj_class)
+        object.__setattr__(self, 'id', obj_id)
+        object.__setattr__(self, '_known', attributes)
+        object.__setattr__(self, '_obj', None)
+
+    @property
+    def resolved(self):
+        return self._obj is not None
+
+    def resolve(self, obj=None):
+        """
+        Retrieves the object from the default provider, unless it has been supplied
+        :param obj: :class:`eveonline.providers.Entity` retrieved elsewhere, for instance in bulk
+        :return: :class:`eveonline.providers.Entity`
+        """
+        if obj is not None:
+            object.__setattr__(self, '_obj', obj)
+        elif self._obj is None:
+            provider = eve_provider_factory()
+            object.__setattr__(self, '_obj', getattr(provider, 'get_%s' % self._obj_class.__name__.lower())(self.id))
+        return self._obj
+
+    def __getattr__(self, item):
+        # only called for attributes not on the proxy itself
+        if item.startswith('_'):
+            raise AttributeError(item)
+        if item in self._known:
+            return self._known[item]
+        return getattr(self.resolve(), item)
+
+    def __setattr__(self, key, value):
+        if key in self._known:
+            self._known[key] = value
+        else:
+            setattr(self.resolve(), key, value)
+
+    def __reduce__(self):
+        return _restore_proxy, (self._obj_class, self.id, self._known)
+
+    def __str__(self):
+        return str(self.name)
+
+    def __int__(self):
+        return int(self.id)
+
+    def __repr__(self):
+        return "<{} ({}) {}>".format(self.__class__.__name__, self._obj_class.__name__, self.id)
+
+    def __bool__(self):
+        return bool(self.id)
+
+    def __eq__(self, other):
+        try:
+            return int(self) == int(other) and str(self) == str(other)
+        except (TypeError, ValueError):
+            # not an entity or ID, such as the empty values django checks fields against
+            return False
 
 
 class EveProvider(object):
+    # types retrieved one request per object, which caching providers revalidate by ETag even when many are requested
+    conditional_types = ()
+
     def get_alliance(self, alliance_id):
         """
         :return: :class:`eveonline.providers.Alliance`
@@ -252,132 +424,692 @@ class EveProvider(object):
         """
         raise NotImplementedError()
 
+    def get_alliances(self, alliance_ids):
+        """
+        :return: dict of ID: :class:`eveonline.providers.Alliance`, omitting IDs which were not found
+        """
+        return self._get_many(self.get_alliance, alliance_ids)
+
+    def get_corporations(self, corp_ids):
+        """
+        :return: dict of ID: :class:`eveonline.providers.Corporation`, omitting IDs which were not found
+        """
+        return self._get_many(self.get_corporation, corp_ids)
+
+    def get_characters(self, character_ids):
+        """
+        :return: dict of ID: :class:`eveonline.providers.Character`, omitting IDs which were not found
+        """
+        return self._get_many(self.get_character, character_ids)
+
+    def get_itemtypes(self, type_ids):
+        """
+        :return: dict of ID: :class:`eveonline.providers.ItemType`, omitting IDs which were not found
+        """
+        return self._get_many(self.get_itemtype, type_ids)
+
+    def get_factions(self, faction_ids):
+        """
+        :return: dict of ID: :class:`eveonline.providers.Faction`, omitting IDs which were not found
+        """
+        return self._get_many(self.get_faction, faction_ids)
+
+    def get_affiliations(self, character_ids):
+        """
+        Retrieves the current corporation, alliance and faction of many characters
+        :return: dict of ID: dict of 'corporation_id', 'alliance_id' and 'faction_id', omitting IDs which were not found
+        """
+        chars = self.get_characters(character_ids)
+        prefetch_related(chars.values(), provider=self)
+        return {
+            obj_id: {
+                'corporation_id': char.corporation_id,
+                'alliance_id': char.corporation.alliance_id,
+                'faction_id': char.corporation.faction_id,
+            } for obj_id, char in chars.items()
+        }
+
+    def get_conditional(self, obj_class, obj_id, etag=None):
+        """
+        Retrieves an object, unless unchanged since it was retrieved with the given ETag
+        Providers without ETag support always retrieve the object
+        :param obj_class: :class:`eveonline.providers.Entity` subclass to retrieve
+        :param etag: ETag returned by a previous call, or None
+        :return: tuple of (object, or None if unchanged; ETag, or None; timestamp the object expires, or None)
+        """
+        return getattr(self, 'get_%s' % obj_class.__name__.lower())(obj_id), None, None
+
+    def prime(self, objs, timeout=None):
+        """
+        Offers objects retrieved as a by-product of another request, such as a list endpoint, to caching layers
+        No-op unless implemented by a caching provider
+        :param objs: iterable of :class:`eveonline.providers.Entity`
+        :param timeout: seconds the objects remain valid, or None for the default
+        """
+        pass
+
+    @staticmethod
+    def _get_many(method, obj_ids):
+        """
+        Fallback for providers without bulk endpoints: retrieves objects individually, several at a time
+        """
+        def get(obj_id):
+            try:
+                return method(obj_id)
+            except ObjectNotFound:
+                return None
+
+        obj_ids = list(set(int(obj_id) for obj_id in obj_ids))
+        return {obj_id: obj for obj_id, obj in zip(obj_ids, map_concurrently(get, obj_ids)) if obj is not None}
+
+
+def chunked(iterable, size):
+    """
+    Yields successive lists of at most size items from an iterable
+    """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def map_concurrently(func, items, max_workers=None):
+    """
+    Calls func for every item using a pool of threads, for fanning out blocking API requests
+    :param max_workers: maximum simultaneous calls, defaults to settings.EVEONLINE_MAX_CONCURRENCY
+    :return: list of results in the same order as items
+    """
+    items = list(items)
+    max_workers = min(max_workers or MAX_CONCURRENCY, len(items))
+    if max_workers <= 1:
+        return [func(item) for item in items]
+    background = is_background()
+
+    def call(item):
+        # workers make requests with the priority of the calling thread
+        _priority.background = background
+        try:
+            return func(item)
+        finally:
+            # don't leak database connections opened by providers in worker threads
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(call, items))
+
+
+# building a client parses the swagger spec, so clients and providers are shared within the process
+_pool_lock = threading.RLock()
+_esi_clients = {}
+_providers = {}
+
+
+def get_esi_client(token=None, **versions):
+    """
+    Returns a shared ESI client, building it on first use
+    :param token: :class:`esi.models.Token` or None for unauthenticated access
+    :param versions: resource name:version, as accepted by :func:`esi.clients.esi_client_factory`
+    """
+    key = (getattr(token, 'pk', None), tuple(sorted(versions.items())))
+    with _pool_lock:
+        if key not in _esi_clients:
+            _esi_clients[key] = esi_client_factory(token=token, **versions)
+        return _esi_clients[key]
+
+
+def clear_provider_pool(token=None):
+    """
+    Discards shared clients and providers so they are rebuilt on next use
+    :param token: :class:`esi.models.Token` to only discard those using this token, for instance after it is deleted
+    """
+    with _pool_lock:
+        if token is None:
+            _esi_clients.clear()
+            _providers.clear()
+        else:
+            for key in [k for k in _esi_clients if k[0] == token.pk]:
+                del _esi_clients[key]
+            for key in [k for k in _providers if k[2] == token.pk]:
+                del _providers[key]
+
+
+def parse_expires(headers):
+    """
+    :param headers: HTTP response headers
+    :return: timestamp of the Expires header, or None if absent or malformed
+    """
+    try:
+        return mktime_tz(parsedate_tz(headers['Expires']))
+    except (KeyError, TypeError):
+        return None
+
+
+_priority = threading.local()
+
+
+@contextmanager
+def background_requests():
+    """
+    Marks ESI requests made by this thread within the block as background work, to be held back in favour of
+    interactive lookups, for instance in periodic tasks
+    """
+    previous = getattr(_priority, 'background', False)
+    _priority.background = True
+    try:
+        yield
+    finally:
+        _priority.background = previous
+
+
+def is_background():
+    return getattr(_priority, 'background', False)
+
+
+class EsiRequestScheduler(object):
+    """
+    Queues ESI requests to stay clear of the error limit
+    ESI blocks clients exceeding a number of errors per window. The remaining errors and window reset reported in each
+    response are shared between processes through the django cache, and requests are held until the window resets
+    once few errors remain: background requests when fewer than settings.EVEONLINE_ESI_ERROR_LIMIT_THRESHOLD remain,
+    interactive requests when fewer than half of that remain.
+    Within a process at most settings.EVEONLINE_MAX_CONCURRENCY requests are made at once, of which background
+    requests may take half, and only when no interactive requests are waiting.
+    """
+
+    cache_key = 'eveonline__esi_error_limit'
+
+    # seconds before the shared error limit is read from the cache again
+    refresh_interval = 1
+
+    def __init__(self, max_concurrency=None):
+        self.max_concurrency = max_concurrency or MAX_CONCURRENCY
+        self.max_background = max(1, self.max_concurrency // 2)
+        self._condition = threading.Condition()
+        self._active = 0
+        self._active_background = 0
+        self._waiting = 0
+        self._limit = None
+        self._limit_read = 0
+
+    def error_limit(self):
+        """
+        :return: tuple of (errors remaining, timestamp the window resets) last reported, or None if unknown
+        """
+        if time.time() - self._limit_read >= self.refresh_interval:
+            self._limit = cache.get(self.cache_key)
+            self._limit_read = time.time()
+        return self._limit
+
+    def update(self, headers):
+        """
+        Records the error limit reported in ESI response headers
+        """
+        try:
+            remain = int(headers['X-Esi-Error-Limit-Remain'])
+            reset = int(headers['X-Esi-Error-Limit-Reset'])
+        except (KeyError, TypeError, ValueError):
+            return
+        self._limit = (remain, time.time() + reset)
+        self._limit_read = time.time()
+        cache.set(self.cache_key, self._limit, reset + 1)
+
+    def _wait_for_error_limit(self, background):
+        threshold = ESI_ERROR_LIMIT_THRESHOLD if background else ESI_ERROR_LIMIT_THRESHOLD // 2
+        limit = self.error_limit()
+        while limit and limit[0] < threshold and limit[1] > time.time():
+            logger.warning('%s ESI errors remain, holding %s request for %.0fs', limit[0],
+                           'background' if background else 'interactive', limit[1] - time.time())
+            time.sleep(max(0, limit[1] - time.time()))
+            limit = self.error_limit()
+
+    @contextmanager
+    def slot(self, background=False):
+        """
+        Waits for the error limit and a free request slot
+        """
+        self._wait_for_error_limit(background)
+        with self._condition:
+            if background:
+                while self._active >= self.max_concurrency or self._active_background >= self.max_background or \
+                        self._waiting:
+                    self._condition.wait()
+                self._active_background += 1
+            else:
+                self._waiting += 1
+                while self._active >= self.max_concurrency:
+                    self._condition.wait()
+                self._waiting -= 1
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                if background:
+                    self._active_background -= 1
+                self._condition.notify_all()
+
+    def request(self, operation, headers=None, **kwargs):
+        """
+        Calls an ESI operation once a slot is free, with the priority of the calling thread
+        :param operation: bravado operation, for instance client.Character.get_characters_character_id
+        :param headers: dict of additional request headers
+        :return: tuple of (result, response)
+        """
+        kwargs['_request_options'] = {'also_return_response': True}
+        if headers:
+            kwargs['_request_options']['headers'] = headers
+        with self.slot(is_background()):
+            try:
+                result, response = operation(**kwargs).result()
+            except HTTPError as e:
+                self.update(getattr(e.response, 'headers', None))
+                raise
+        self.update(response.headers)
+        return result, response
+
+
+esi_scheduler = EsiRequestScheduler()
+
+
+class ReferenceData(object):
+    """
+    Process-wide store for data sets which can only be retrieved whole, indexed by ID
+    Loaded on first use and reloaded once the expiry given by the source passes
+    Subclasses must implement fetch()
+    """
+
+    # seconds to keep data if the source gives no expiry
+    default_duration = 3600
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._expires = 0
+
+    def fetch(self):
+        """
+        Retrieves the data set from its source
+        :return: tuple of (dict of ID:data, expiry timestamp or None)
+        """
+        raise NotImplementedError()
+
+    @property
+    def stale(self):
+        return self._index is None or self._expires <= time.time()
+
+    def load(self, index, expires=None):
+        """
+        Installs a freshly retrieved data set
+        """
+        self._expires = expires or time.time() + self.default_duration
+        self._index = index
+
+    def index(self):
+        """
+        :return: dict of ID:data
+        """
+        if self.stale:
+            with self._lock:
+                # another thread may have reloaded while we waited for the lock
+                if self.stale:
+                    self.load(*self.fetch())
+        return self._index
+
+    def get(self, obj_id):
+        """
+        :return: data for the given ID or None if not present
+        """
+        return self.index().get(int(obj_id))
+
+    def invalidate(self):
+        with self._lock:
+            self._index = None
+
+
+class FactionReference(ReferenceData):
+    """
+    Faction list from ESI, with a name lookup to resolve the faction names given for corporations
+    """
+
+    def __init__(self):
+        super(FactionReference, self).__init__()
+        self._names = []
+
+    def fetch(self):
+        data, response = esi_scheduler.request(get_esi_client(Universe='v1').Universe.get_universe_factions)
+        return {f['faction_id']: f for f in data}, parse_expires(response.headers)
+
+    def load(self, index, expires=None):
+        self._names = sorted((f['name'], faction_id) for faction_id, f in index.items())
+        super(FactionReference, self).load(index, expires=expires)
+
+    def id_from_name(self, name):
+        """
+        :param name: full faction name or the start of one, for instance 'Caldari' for 'Caldari State'
+        :return: faction ID or None if no faction name matches
+        """
+        self.index()
+        names = self._names
+        position = bisect.bisect_left(names, (name,))
+        if position < len(names) and names[position][0].startswith(name):
+            return names[position][1]
+        return None
+
+
+faction_reference = FactionReference()
+
 
 @python_2_unicode_compatible
 class EveSwaggerProvider(EveProvider):
+    # maximum number of IDs accepted by bulk endpoints like /universe/names/ and /characters/affiliation/
+    bulk_chunk_size = 1000
+    # rejected chunks this small are retried one ID per request, costing one error per invalid ID
+    bisect_min_size = 16
+
+    # retrieved one request per object even in bulk, so worth revalidating
+    conditional_types = (Alliance, Corporation)
+
+    versions = {
+        'Alliance': 'v1',
+        'Character': 'v4',
+        'Corporation': 'v3',
+        'Universe': 'v2',
+    }
+
     def __init__(self, token=None, adapter=None):
-        self.client = esi_client_factory(token=token, Alliance='v1', Character='v4', Corporation='v3', Universe='v2')
+        self.client = get_esi_client(token=token, **self.versions)
         self.adapter = adapter or self
 
     def __str__(self):
         return 'esi'
 
-    def get_alliance(self, alliance_id):
-        try:
-            data = self.client.Alliance.get_alliances_alliance_id(alliance_id=alliance_id).result()
-            corps = self.client.Alliance.get_alliances_alliance_id_corporations(alliance_id=alliance_id).result()
-            model = Alliance(
-                self.adapter,
-                alliance_id,
-                data['alliance_name'],
-                data['ticker'],
-                corps,
-                data['executor_corporation_id'],
-            )
-            return model
-        except HTTPNotFound:
-            raise ObjectNotFound(alliance_id, 'alliance')
+    @staticmethod
+    def _request(operation, **kwargs):
+        # every request goes through the scheduler to respect the error limit
+        return esi_scheduler.request(operation, **kwargs)[0]
 
     @staticmethod
-    def _faction_name_to_id(name):
-        factions = esi_client_factory(Universe='v1').get_factions().result()
+    def _conditional_request(operation, etag=None, **kwargs):
+        """
+        Makes a request, sending the ETag of a previous response so unchanged data isn't sent again
+        :return: tuple of (result, or None if not modified; ETag; timestamp the response expires, or None)
+        """
         try:
-            return [f['faction_id'] for f in factions if f['name'].startswith(name)][0]
-        except KeyError:
-            return None
+            data, response = esi_scheduler.request(operation, headers={'If-None-Match': etag} if etag else None,
+                                                   **kwargs)
+        except HTTPError as e:
+            if getattr(e.response, 'status_code', None) != 304:
+                raise
+            data, response = None, e.response
+        return data, response.headers.get('ETag', etag), parse_expires(response.headers)
+
+    def get_conditional(self, obj_class, obj_id, etag=None):
+        getters = {
+            Alliance: self._get_alliance,
+            Corporation: self._get_corporation,
+            Character: self._get_character,
+            ItemType: self._get_itemtype,
+        }
+        if obj_class in getters:
+            return getters[obj_class](obj_id, etag=etag)
+        return super(EveSwaggerProvider, self).get_conditional(obj_class, obj_id, etag=etag)
+
+    def get_alliance(self, alliance_id):
+        return self._get_alliance(alliance_id)[0]
 
     def get_corporation(self, corp_id):
+        return self._get_corporation(corp_id)[0]
+
+    def get_character(self, character_id):
+        return self._get_character(character_id)[0]
+
+    def get_itemtype(self, type_id):
+        return self._get_itemtype(type_id)[0]
+
+    def _get_alliance(self, alliance_id, etag=None):
+        # alliances are built from two responses, so have a pair of ETags
+        data_etag, corps_etag = etag or (None, None)
+        operations = (
+            self.client.Alliance.get_alliances_alliance_id,
+            self.client.Alliance.get_alliances_alliance_id_corporations,
+        )
         try:
-            data = self.client.Corporation.get_corporations_corporation_id(corporation_id=corp_id).result()
-            if 'faction' in data:
-                faction_id = self._faction_name_to_id(data['faction'])
-            else:
-                faction_id = None
-            model = Corporation(
-                self.adapter,
-                corp_id,
-                data['corporation_name'],
-                data['ticker'],
-                data['ceo_id'],
-                data['member_count'],
-                data['alliance_id'] if 'alliance_id' in data else None,
-                faction_id
-            )
-            return model
+            (data, data_etag, data_expires), (corps, corps_etag, corps_expires) = [
+                self._conditional_request(operation, previous, alliance_id=alliance_id)
+                for operation, previous in zip(operations, (data_etag, corps_etag))
+            ]
+            expires = min([e for e in (data_expires, corps_expires) if e] or [None])
+            if data is None and corps is None:
+                return None, (data_etag, corps_etag), expires
+            # only one part changed, but both are needed to build the alliance
+            if data is None:
+                data, data_etag, data_expires = self._conditional_request(operations[0], alliance_id=alliance_id)
+            if corps is None:
+                corps, corps_etag, corps_expires = self._conditional_request(operations[1], alliance_id=alliance_id)
+        except HTTPNotFound:
+            raise ObjectNotFound(alliance_id, 'alliance')
+        model = Alliance(
+            alliance_id,
+            data['alliance_name'],
+            data['ticker'],
+            corps,
+            data['executor_corporation_id'],
+            provider=self.adapter,
+        )
+        return model, (data_etag, corps_etag), expires
+
+    def _get_corporation(self, corp_id, etag=None):
+        try:
+            data, etag, expires = self._conditional_request(
+                self.client.Corporation.get_corporations_corporation_id, etag, corporation_id=corp_id)
         except HTTPNotFound:
             raise ObjectNotFound(corp_id, 'corporation')
+        if data is None:
+            return None, etag, expires
+        if 'faction' in data:
+            faction_id = faction_reference.id_from_name(data['faction'])
+        else:
+            faction_id = None
+        model = Corporation(
+            corp_id,
+            data['corporation_name'],
+            data['ticker'],
+            data['ceo_id'],
+            data['member_count'],
+            data['alliance_id'] if 'alliance_id' in data else None,
+            faction_id,
+            provider=self.adapter,
+        )
+        return model, etag, expires
 
-    def get_character(self, character_id):
+    def _get_character(self, character_id, etag=None):
         try:
-            data = self.client.Character.get_characters_character_id(character_id=character_id).result()
-            model = Character(
-                self.adapter,
-                character_id,
-                data['name'],
-                data['corporation_id'],
-            )
-            return model
+            data, etag, expires = self._conditional_request(
+                self.client.Character.get_characters_character_id, etag, character_id=character_id)
         except (HTTPNotFound, HTTPUnprocessableEntity):
             raise ObjectNotFound(character_id, 'character')
+        if data is None:
+            return None, etag, expires
+        model = Character(
+            character_id,
+            data['name'],
+            data['corporation_id'],
+            provider=self.adapter,
+        )
+        return model, etag, expires
 
-    def get_itemtype(self, type_id):
+    def _get_itemtype(self, type_id, etag=None):
         try:
-            data = self.client.Universe.get_universe_types_type_id(type_id=type_id).result()
-            return ItemType(self.adapter, type_id, data['name'])
+            data, etag, expires = self._conditional_request(
+                self.client.Universe.get_universe_types_type_id, etag, type_id=type_id)
         except (HTTPNotFound, HTTPUnprocessableEntity):
             raise ObjectNotFound(type_id, 'type')
+        if data is None:
+            return None, etag, expires
+        return ItemType(type_id, data['name'], provider=self.adapter), etag, expires
+
+    def _faction_from_data(self, data):
+        return Faction(data['faction_id'], data['name'], data['description'], provider=self.adapter)
 
     def get_faction(self, faction_id):
-        try:
-            data = esi_client_factory(Universe='v1').Universe.get_factions().result()
-            faction_data = [faction for faction in data if faction['faction_id'] == faction_id][0]
-            return Faction(self, faction_data['faction_id'], faction_data['name'], faction_data['description'])
-        except KeyError:
+        data = faction_reference.get(faction_id)
+        if data is None:
             raise ObjectNotFound(faction_id, 'faction')
+        return self._faction_from_data(data)
 
+    def _post_chunked(self, operation, param, obj_ids):
+        """
+        Submits IDs to a bulk endpoint in chunks no larger than the endpoint accepts
+        :return: list of results for all valid IDs
+        """
+        results = []
+        for chunk in chunked(obj_ids, self.bulk_chunk_size):
+            results.extend(self._post_valid(operation, param, chunk))
+        return results
 
-@python_2_unicode_compatible
-class EveXmlProvider(EveProvider):
-    def __init__(self, api_key=None, adapter=None):
+    def _post_valid(self, operation, param, obj_ids):
         """
-        :param api_key: tuple of api_id, verification_code
+        Bulk endpoints reject the entire request if any one ID is invalid
+        Bisect the rejected chunk to isolate invalid IDs and return results for the rest, retrying chunks of at most
+        bisect_min_size IDs one at a time as each rejection counts against ESI's error limit
+        Once fewer than settings.EVEONLINE_ESI_ERROR_LIMIT_THRESHOLD errors remain the rejection is raised instead
         """
-        self.api = evelink.api.API(api_key=api_key) if api_key else evelink.api.API()
-        self.adapter = adapter or self
+        try:
+            return self._request(operation, **{param: obj_ids})
+        except (HTTPNotFound, HTTPUnprocessableEntity) as e:
+            if len(obj_ids) == 1:
+                return []
+            if len(obj_ids) <= self.bisect_min_size:
+                parts = [[obj_id] for obj_id in obj_ids]
+            else:
+                middle = len(obj_ids) // 2
+                parts = [obj_ids[:middle], obj_ids[middle:]]
+            results = []
+            for part in parts:
+                limit = esi_scheduler.error_limit()
+                if limit and limit[0] < ESI_ERROR_LIMIT_THRESHOLD and limit[1] > time.time():
+                    raise e
+                results.extend(self._post_valid(operation, param, part))
+            return results
+
+    def _get_names(self, obj_ids, category):
+        results = self._post_chunked(self.client.Universe.post_universe_names, 'ids', obj_ids)
+        return {r['id']: r['name'] for r in results if r['category'] == category}
+
+    def get_affiliations(self, character_ids):
+        affiliations = self._post_chunked(self.client.Character.post_characters_affiliation, 'characters',
+                                          list(set(int(obj_id) for obj_id in character_ids)))
+        return {
+            a['character_id']: {
+                'corporation_id': a['corporation_id'],
+                'alliance_id': a.get('alliance_id'),
+                'faction_id': a.get('faction_id'),
+            } for a in affiliations
+        }
 
-    def __str__(self):
-        return 'xml'
+    def get_characters(self, character_ids):
+        names = self._get_names(set(int(obj_id) for obj_id in character_ids), 'character')
+        return {
+            obj_id: Character(
+                obj_id,
+                names[obj_id],
+                affiliation['corporation_id'],
+                provider=self.adapter,
+            ) for obj_id, affiliation in self.get_affiliations(list(names)).items()
+        }
 
-    def get_alliance(self, obj_id):
-        api = evelink.eve.EVE(api=self.api)
-        alliances = api.alliances().result
-        try:
-            results = alliances[int(obj_id)]
-            model = Alliance(
-                self.adapter,
-                obj_id,
-                results['name'],
-                results['ticker'],
-                results['member_corps'],
-                results['executor_id'],
+    def get_itemtypes(self, type_ids):
+        names = self._get_names(set(int(obj_id) for obj_id in type_ids), 'inventory_type')
+        return {obj_id: ItemType(obj_id, name, provider=self.adapter) for obj_id, name in names.items()}
+
+    def get_factions(self, faction_ids):
+        index = faction_reference.index()
+        faction_ids = set(int(obj_id) for obj_id in faction_ids)
+        return {obj_id: self._faction_from_data(index[obj_id]) for obj_id in faction_ids if obj_id in index}
+
+
+class XmlAllianceReference(ReferenceData):
+    """
+    XML API alliance list, which can only be retrieved whole including all member corporations
+    """
+
+    def fetch(self):
+        result = evelink.eve.EVE().alliances()
+        return result.result, result.expires
+
+    @property
+    def expires(self):
+        return self._expires
+
+
+xml_alliance_reference = XmlAllianceReference()
+
+
+@python_2_unicode_compatible
+class EveXmlProvider(EveProvider):
+    def __init__(self, api_key=None, adapter=None):
+        """
+        :param api_key: tuple of api_id, verification_code
+        """
+        self.api = evelink.api.API(api_key=api_key) if api_key else evelink.api.API()
+        self.adapter = adapter or self
+        self._primed_alliances = None
+
+    def __str__(self):
+        return 'xml'
+
+    def _alliance_from_data(self, data):
+        return Alliance(
+            data['id'],
+            data['name'],
+            data['ticker'],
+            list(data['member_corps']),
+            data['executor_id'],
+            provider=self.adapter,
+        )
+
+    def _alliances(self):
+        """
+        Retrieves the indexed alliance list, priming the cache with every alliance whenever the list is reloaded
+        """
+        alliances = xml_alliance_reference.index()
+        if alliances is not self._primed_alliances:
+            self._primed_alliances = alliances
+            self.adapter.prime(
+                [self._alliance_from_data(data) for data in alliances.values()],
+                timeout=xml_alliance_reference.expires - time.time(),
             )
-            return model
+        return alliances
+
+    def get_alliance(self, obj_id):
+        try:
+            return self._alliance_from_data(self._alliances()[int(obj_id)])
         except KeyError:
             raise ObjectNotFound(obj_id, 'alliance')
 
+    def get_alliances(self, obj_ids):
+        alliances = self._alliances()
+        obj_ids = set(int(obj_id) for obj_id in obj_ids)
+        return {obj_id: self._alliance_from_data(alliances[obj_id]) for obj_id in obj_ids if obj_id in alliances}
+
     def get_corporation(self, obj_id):
         api = evelink.corp.Corp(api=self.api)
         try:
             corpinfo = api.corporation_sheet(corp_id=int(obj_id)).result
             model = Corporation(
-                self.adapter,
                 obj_id,
                 corpinfo['name'],
+                corpinfo['ticker'],
                 corpinfo['ceo']['id'],
                 corpinfo['members']['current'],
-                corpinfo['ticker'],
                 corpinfo['alliance']['id'] if corpinfo['alliance'] else None,
                 corpinfo['faction']['id'] if corpinfo['faction'] else None,
+                provider=self.adapter,
             )
             return model
         except evelink.api.APIError as e:
@@ -390,10 +1122,10 @@ class EveXmlProvider(EveProvider):
         try:
             result = api.character_info_from_id(obj_id).result
             return Character(
-                self.adapter,
                 result['id'],
                 result['name'],
                 result['corp']['id'],
+                provider=self.adapter,
             )
         except evelink.api.APIError as e:
             if int(e.code) == 105:
@@ -405,7 +1137,7 @@ class EveXmlProvider(EveProvider):
         try:
             type_name = api.type_name_from_id(obj_id).result
             assert type_name != 'Unknown Type'
-            return ItemType(self.adapter, obj_id, type_name)
+            return ItemType(obj_id, type_name, provider=self.adapter)
         except AssertionError:
             raise ObjectNotFound(obj_id, 'itemtype')
 
@@ -413,18 +1145,667 @@ class EveXmlProvider(EveProvider):
         api = evelink.eve.EVE(api=self.api)
         try:
             result = api.character_info_from_id(faction_id).result
-            return Faction(self, faction_id, result['name'], None)
+            return Faction(faction_id, result['name'], None, provider=self.adapter)
         except evelink.api.APIError as e:
             if int(e.code) == 105:
                 raise ObjectNotFound(faction_id, 'faction')
             raise e
 
 
+class DelegatingProvider(EveProvider):
+    """
+    Base for providers answering some requests themselves and passing the rest on to a wrapped provider
+    """
+
+    def __init__(self, provider=None, adapter=None):
+        """
+        :param provider: :class:`eveonline.providers.EveProvider` for requests not answered by this one
+        """
+        self.provider = provider
+        self.adapter = adapter or self
+
+    @property
+    def adapter(self):
+        return self._adapter
+
+    @adapter.setter
+    def adapter(self, adapter):
+        # objects from the wrapped provider should look up their relations through the same chain
+        self._adapter = adapter
+        if self.provider is not None:
+            self.provider.adapter = adapter
+
+    @property
+    def _fallback(self):
+        if self.provider is None:
+            raise NotImplementedError('%s has no provider to retrieve this type from' % self.__class__.__name__)
+        return self.provider
+
+    @property
+    def conditional_types(self):
+        return self.provider.conditional_types if self.provider is not None else ()
+
+    def get_conditional(self, obj_class, obj_id, etag=None):
+        return self._fallback.get_conditional(obj_class, obj_id, etag=etag)
+
+    def get_alliance(self, alliance_id):
+        return self._fallback.get_alliance(alliance_id)
+
+    def get_corporation(self, corp_id):
+        return self._fallback.get_corporation(corp_id)
+
+    def get_character(self, character_id):
+        return self._fallback.get_character(character_id)
+
+    def get_itemtype(self, type_id):
+        return self._fallback.get_itemtype(type_id)
+
+    def get_faction(self, faction_id):
+        return self._fallback.get_faction(faction_id)
+
+    def get_alliances(self, alliance_ids):
+        return self._fallback.get_alliances(alliance_ids)
+
+    def get_corporations(self, corp_ids):
+        return self._fallback.get_corporations(corp_ids)
+
+    def get_characters(self, character_ids):
+        return self._fallback.get_characters(character_ids)
+
+    def get_itemtypes(self, type_ids):
+        return self._fallback.get_itemtypes(type_ids)
+
+    def get_factions(self, faction_ids):
+        return self._fallback.get_factions(faction_ids)
+
+    def get_affiliations(self, character_ids):
+        return self._fallback.get_affiliations(character_ids)
+
+    def status(self):
+        """
+        Status of a :class:`eveonline.providers.FailoverProvider` further down the chain
+        """
+        return self._fallback.status()
+
+
+@python_2_unicode_compatible
+class SdeProvider(DelegatingProvider):
+    """
+    Serves item types and factions from the ItemType and Faction models, as loaded from the static data export by the
+    import_sde management command, so retrieving them never contacts the API
+    Characters, corporations and alliances are retrieved from the wrapped provider
+    """
+
+    def __str__(self):
+        return 'sde'
+
+    def get_conditional(self, obj_class, obj_id, etag=None):
+        if obj_class in (ItemType, Faction):
+            return self._get_row(obj_class, obj_id), None, None
+        return super(SdeProvider, self).get_conditional(obj_class, obj_id, etag=etag)
+
+    def get_itemtype(self, type_id):
+        return self._get_row(ItemType, type_id)
+
+    def get_faction(self, faction_id):
+        return self._get_row(Faction, faction_id)
+
+    def get_itemtypes(self, type_ids):
+        return self._get_rows(ItemType, type_ids)
+
+    def get_factions(self, faction_ids):
+        return self._get_rows(Faction, faction_ids)
+
+    def _get_row(self, obj_class, obj_id):
+        objs = self._get_rows(obj_class, [obj_id])
+        if int(obj_id) not in objs:
+            raise ObjectNotFound(obj_id, obj_class.__name__.lower())
+        return objs[int(obj_id)]
+
+    def _get_rows(self, obj_class, obj_ids):
+        # the models module imports this one
+        from eveonline import models
+        model = getattr(models, obj_class.__name__)
+        fields = ('id', 'name', 'description') if obj_class is Faction else ('id', 'name')
+        rows = model.objects.filter(id__in=list(set(int(obj_id) for obj_id in obj_ids))).values_list(*fields)
+        return {row[0]: obj_class(*row, provider=self.adapter) for row in rows}
+
+
+@python_2_unicode_compatible
+class DatabaseEveProvider(DelegatingProvider):
+    """
+    Answers from the stored models, only asking the wrapped provider for objects which are not stored or were last
+    updated longer ago than settings.EVEONLINE_DATABASE_MAX_AGES allows, and storing the objects it returns
+    Alliances are always retrieved from the wrapped provider as their member corporations are not stored
+    """
+
+    def __str__(self):
+        return 'db'
+
+    @property
+    def conditional_types(self):
+        # stored types are read from the models in bulk, which retrieving each by ETag would bypass
+        return tuple(obj_class for obj_class in super(DatabaseEveProvider, self).conditional_types
+                     if obj_class is Alliance)
+
+    def _entity(self, obj_class, instance):
+        if obj_class is Character:
+            return Character(instance.id, instance.name, instance.corporation_id, provider=self.adapter)
+        elif obj_class is Corporation:
+            return Corporation(instance.id, instance.name, instance.ticker, instance.ceo_id, instance.members,
+                               instance.alliance_id, instance.faction_id, provider=self.adapter)
+        elif obj_class is Faction:
+            return Faction(instance.id, instance.name, instance.description, provider=self.adapter)
+        return ItemType(instance.id, instance.name, provider=self.adapter)
+
+    @staticmethod
+    def _model(obj_class):
+        # the models module imports this one
+        from eveonline import models
+        return getattr(models, obj_class.__name__)
+
+    def stored(self, obj_class, obj_ids):
+        """
+        Reads objects which are fresh enough from the models
+        :return: dict of ID:object for those found
+        """
+        max_age = DATABASE_MAX_AGES.get(obj_class.__name__.lower())
+        instances = self._model(obj_class).objects.filter(id__in=list(set(int(obj_id) for obj_id in obj_ids)))
+        if max_age is not None:
+            instances = instances.filter(last_updated__gte=timezone.now() - timedelta(seconds=max_age))
+        if obj_class is Corporation:
+            # stored before CEOs were
+            instances = instances.filter(ceo_id__isnull=False)
+        return {instance.id: self._entity(obj_class, instance) for instance in instances}
+
+    def write_back(self, obj_class, objs):
+        """
+        Stores objects retrieved from the wrapped provider
+        Failing to store them is logged rather than failing the lookup
+        """
+        objs = list(objs)
+        if not objs:
+            return
+        try:
+            # savepoint so a failure doesn't break any transaction the caller is in
+            with transaction.atomic():
+                self._model(obj_class).bulk_from_provider_objs(objs, provider=self.adapter)
+        except DatabaseError:
+            logger.exception('Failed to store %s %s objects', len(objs), obj_class.__name__)
+
+    def _get_object(self, obj_class, obj_id):
+        return self.get_conditional(obj_class, obj_id)[0]
+
+    def get_conditional(self, obj_class, obj_id, etag=None):
+        obj = None if obj_class is Alliance else self.stored(obj_class, [obj_id]).get(int(obj_id))
+        if obj is not None:
+            return obj, None, None
+        obj, etag, expires = self._fallback.get_conditional(obj_class, obj_id, etag=etag)
+        if obj is not None:
+            self.write_back(obj_class, [obj])
+        return obj, etag, expires
+
+    def _get_objects(self, obj_class, obj_ids):
+        type_name = obj_class.__name__.lower()
+        obj_ids = set(int(obj_id) for obj_id in obj_ids)
+        objs = self.stored(obj_class, obj_ids)
+        missing = [obj_id for obj_id in obj_ids if obj_id not in objs]
+        if missing:
+            fetched = getattr(self._fallback, 'get_%ss' % type_name)(missing)
+            self.write_back(obj_class, fetched.values())
+            objs.update(fetched)
+        return objs
+
+    def get_alliance(self, alliance_id):
+        return self._get_object(Alliance, alliance_id)
+
+    def get_alliances(self, alliance_ids):
+        objs = self._fallback.get_alliances(alliance_ids)
+        self.write_back(Alliance, objs.values())
+        return objs
+
+    def get_character(self, character_id):
+        return self._get_object(Character, character_id)
+
+    def get_corporation(self, corp_id):
+        return self._get_object(Corporation, corp_id)
+
+    def get_itemtype(self, type_id):
+        return self._get_object(ItemType, type_id)
+
+    def get_faction(self, faction_id):
+        return self._get_object(Faction, faction_id)
+
+    def get_characters(self, character_ids):
+        return self._get_objects(Character, character_ids)
+
+    def get_corporations(self, corp_ids):
+        return self._get_objects(Corporation, corp_ids)
+
+    def get_itemtypes(self, type_ids):
+        return self._get_objects(ItemType, type_ids)
+
+    def get_factions(self, faction_ids):
+        return self._get_objects(Faction, faction_ids)
+
+
+class ProviderHealth(object):
+    """
+    Rolling latency and error rate of calls to one provider, and its circuit breaker
+    """
+
+    # weight of the latest call in the rolling averages
+    smoothing = 0.2
+
+    def __init__(self):
+        self.methods = defaultdict(lambda: {'calls': 0, 'latency': None, 'error_rate': 0.0})
+        self.consecutive_errors = 0
+        self.opened_at = None
+
+    def record(self, method_name, duration, error=False):
+        stats = self.methods[method_name]
+        stats['calls'] += 1
+        if not error:
+            stats['latency'] = duration if stats['latency'] is None else \
+                self.smoothing * duration + (1 - self.smoothing) * stats['latency']
+        stats['error_rate'] = self.smoothing * error + (1 - self.smoothing) * stats['error_rate']
+        if error:
+            self.consecutive_errors += 1
+            if self.consecutive_errors >= FAILOVER_ERROR_THRESHOLD:
+                # also restarts the cooldown of a trial call which failed
+                self.opened_at = time.time()
+        else:
+            self.consecutive_errors = 0
+            self.opened_at = None
+
+    @property
+    def available(self):
+        """
+        False while the circuit breaker is open; once the cooldown passes calls are let through on trial
+        """
+        return self.opened_at is None or time.time() - self.opened_at >= FAILOVER_COOLDOWN
+
+    def latency(self, method_name):
+        return self.methods[method_name]['latency']
+
+    def as_dict(self):
+        return {
+            'available': self.available,
+            'consecutive_errors': self.consecutive_errors,
+            'opened_at': self.opened_at,
+            'methods': {name: dict(stats) for name, stats in self.methods.items()},
+        }
+
+
+@python_2_unicode_compatible
+class FailoverProvider(EveProvider):
+    """
+    Tries several providers, routing each call to the fastest available provider for that method and moving on to the
+    next when one fails
+    A provider failing settings.EVEONLINE_FAILOVER_ERROR_THRESHOLD calls in a row is skipped for
+    settings.EVEONLINE_FAILOVER_COOLDOWN seconds
+    ObjectNotFound is an answer rather than a failure, so is raised without trying other providers
+    """
+
+    def __init__(self, providers, adapter=None):
+        """
+        :param providers: list of :class:`eveonline.providers.EveProvider`, in order of preference until their
+        latency is known
+        """
+        self.providers = list(providers)
+        self.health = [ProviderHealth() for provider in self.providers]
+        self._lock = threading.Lock()
+        self.adapter = adapter or self
+
+    def __str__(self):
+        return ','.join(str(provider) for provider in self.providers)
+
+    @property
+    def adapter(self):
+        return self._adapter
+
+    @adapter.setter
+    def adapter(self, adapter):
+        self._adapter = adapter
+        for provider in self.providers:
+            provider.adapter = adapter
+
+    def _route(self, method_name):
+        """
+        :return: list of indices of providers to try, available ones fastest first, then those with an open breaker
+        as a last resort
+        """
+        with self._lock:
+            def speed(index):
+                latency = self.health[index].latency(method_name)
+                # unmeasured providers are tried in order of preference so they get measured
+                return (0, index) if latency is None else (latency, index)
+
+            available = [index for index, health in enumerate(self.health) if health.available]
+            unavailable = [index for index, health in enumerate(self.health) if not health.available]
+            return sorted(available, key=speed) + unavailable
+
+    def _call(self, method_name, *args):
+        error = None
+        for index in self._route(method_name):
+            start = time.time()
+            try:
+                result = getattr(self.providers[index], method_name)(*args)
+            except ObjectNotFound:
+                with self._lock:
+                    self.health[index].record(method_name, time.time() - start)
+                raise
+            except NotImplementedError as e:
+                error = error or e
+                continue
+            except Exception as e:
+                logger.warning('%s failed on %s: %s', method_name, self.providers[index], e)
+                with self._lock:
+                    self.health[index].record(method_name, time.time() - start, error=True)
+                error = e
+                continue
+            with self._lock:
+                self.health[index].record(method_name, time.time() - start)
+            return result
+        raise error
+
+    @property
+    def conditional_types(self):
+        return tuple(set(obj_class for provider in self.providers for obj_class in provider.conditional_types))
+
+    def get_conditional(self, obj_class, obj_id, etag=None):
+        return self._call('get_conditional', obj_class, obj_id, etag)
+
+    def status(self):
+        """
+        :return: dict of provider name: dict of breaker state and per method call counts, latency and error rate
+        """
+        with self._lock:
+            return {str(provider): health.as_dict() for provider, health in zip(self.providers, self.health)}
+
+    def get_alliance(self, alliance_id):
+        return self._call('get_alliance', alliance_id)
+
+    def get_corporation(self, corp_id):
+        return self._call('get_corporation', corp_id)
+
+    def get_character(self, character_id):
+        return self._call('get_character', character_id)
+
+    def get_itemtype(self, type_id):
+        return self._call('get_itemtype', type_id)
+
+    def get_faction(self, faction_id):
+        return self._call('get_faction', faction_id)
+
+    def get_alliances(self, alliance_ids):
+        return self._call('get_alliances', list(alliance_ids))
+
+    def get_corporations(self, corp_ids):
+        return self._call('get_corporations', list(corp_ids))
+
+    def get_characters(self, character_ids):
+        return self._call('get_characters', list(character_ids))
+
+    def get_itemtypes(self, type_ids):
+        return self._call('get_itemtypes', list(type_ids))
+
+    def get_factions(self, faction_ids):
+        return self._call('get_factions', list(faction_ids))
+
+    def get_affiliations(self, character_ids):
+        return self._call('get_affiliations', list(character_ids))
+
+
+# cached in place of an object which doesn't exist
+NOT_FOUND = 'not found'
+
+
+class CacheStatistics(object):
+    """
+    Thread-safe counters of cache events per object type
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(lambda: defaultdict(int))
+
+    def incr(self, type_name, event, count=1):
+        if count:
+            with self._lock:
+                self._counts[type_name][event] += count
+
+    def as_dict(self):
+        """
+        :return: dictionary of type_name:{event:count}
+        """
+        with self._lock:
+            return {type_name: dict(events) for type_name, events in self._counts.items()}
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+class LocalObjectCache(object):
+    """
+    Size-bounded in-process cache with per-entry expiry, evicting least recently used entries when full
+    Objects are copied on the way in and out so callers can't alter the cached copy
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        :return: copy of the cached object, or None if absent or expired
+        """
+        with self._lock:
+            try:
+                expires, obj = self._entries.pop(key)
+            except KeyError:
+                return None
+            if expires <= time.time():
+                return None
+            # reinsert to mark as most recently used
+            self._entries[key] = (expires, obj)
+        return copy.copy(obj)
+
+    def set(self, key, obj, timeout):
+        if not self.max_entries or timeout <= 0:
+            return
+        obj = copy.copy(obj)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time() + timeout, obj)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class PersistentObjectStore(object):
+    """
+    Cache of objects in a local SQLite file, which survives restarts and is shared by processes on the same host
+    Objects are held in their compact form as JSON, so entries from another schema version are ignored
+    Failures are logged and treated as misses, so the store can never fail a lookup
+    """
+
+    # SQLite limits the number of parameters in a query
+    query_chunk_size = 500
+
+    # connections kept open between uses, as the threads which use them come and go
+    max_idle_connections = 4
+
+    # errors from the database, and from entries which can't be encoded or decoded
+    errors = (sqlite3.Error, TypeError, ValueError, KeyError)
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._idle = []
+        self._pid = None
+        self._prepared = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        if not self._prepared:
+            # write ahead logging lets readers carry on while another process writes
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS entities '
+                         '(key TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL, keep_until REAL NOT NULL)')
+            conn.execute('DELETE FROM entities WHERE keep_until < ?', (time.time(),))
+            self._prepared = True
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """
+        Lends a connection from the pool, preparing the file and pruning expired entries on first use by the process
+        """
+        with self._lock:
+            # connections can't survive a fork
+            if self._pid != os.getpid():
+                self._idle, self._pid, self._prepared = [], os.getpid(), False
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._connect()
+        try:
+            yield conn
+        except Exception:
+            conn.close()
+            raise
+        with self._lock:
+            if self._pid == os.getpid() and len(self._idle) < self.max_idle_connections:
+                self._idle.append(conn)
+                conn = None
+        if conn is not None:
+            conn.close()
+
+    def get_many(self, keys):
+        """
+        :return: dict of key: tuple of (cache entry of object, ETag and expiry; timestamp to keep the entry until)
+        """
+        found = {}
+        try:
+            with self._connection() as conn:
+                for chunk in chunked(keys, self.query_chunk_size):
+                    rows = conn.execute(
+                        'SELECT key, data, expires, keep_until FROM entities WHERE keep_until > ? AND key IN (%s)' %
+                        ','.join('?' * len(chunk)), [time.time()] + list(chunk)).fetchall()
+                    for key, data, expires, keep_until in rows:
+                        data = json.loads(data)
+                        try:
+                            obj = from_compact(data['obj'])
+                        except ValueError:
+                            continue
+                        # alliances have a pair of ETags
+                        etag = tuple(data['etag']) if isinstance(data['etag'], list) else data['etag']
+                        found[key] = ((obj, etag, expires), keep_until)
+        except self.errors as e:
+            logger.warning('Failed to read from persistent cache %s: %s', self.path, e)
+        return found
+
+    def set_many(self, entries, timeout):
+        """
+        :param entries: dict of key: tuple of (object, ETag, expiry)
+        :param timeout: seconds to keep the entries for
+        """
+        keep_until = time.time() + timeout
+        try:
+            rows = [(key, json.dumps({'obj': obj.to_compact(), 'etag': etag}), expires, keep_until)
+                    for key, (obj, etag, expires) in entries.items()]
+            with self._connection() as conn:
+                conn.executemany('INSERT OR REPLACE INTO entities (key, data, expires, keep_until) VALUES (?, ?, ?, ?)',
+                                 rows)
+        except self.errors as e:
+            logger.warning('Failed to write to persistent cache %s: %s', self.path, e)
+
+    def clear(self):
+        try:
+            with self._connection() as conn:
+                conn.execute('DELETE FROM entities')
+        except self.errors as e:
+            logger.warning('Failed to clear persistent cache %s: %s', self.path, e)
+
+
+class Flight(object):
+    """
+    A retrieval in progress, whose result is shared with callers waiting on it
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.value = None
+        self.error = None
+
+    def finish(self, value=None, error=None):
+        self.value = value
+        self.error = error
+        self._event.set()
+
+    def wait(self, timeout):
+        """
+        :return: True if the retrieval finished within the timeout
+        """
+        return self._event.wait(timeout)
+
+
+class SingleFlight(object):
+    """
+    Tracks retrievals in progress so concurrent requests for the same key within the process wait on one retrieval
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def claim(self, keys):
+        """
+        :return: tuple of (list of keys the caller must retrieve and then finish, dict of key:flight for those being
+        retrieved by another caller)
+        """
+        leading, following = [], {}
+        with self._lock:
+            for key in keys:
+                if key in self._flights:
+                    following[key] = self._flights[key]
+                else:
+                    self._flights[key] = Flight()
+                    leading.append(key)
+        return leading, following
+
+    def finish(self, key, value=None, error=None):
+        with self._lock:
+            flight = self._flights.pop(key)
+        flight.finish(value, error)
+
+
 class CachingProviderWrapper(EveProvider):
     """
     Caches data from wrapper provider
+    Lookups check local process memory, then the django cache, then the wrapped provider
     """
 
+    # shared by all wrappers in this process, inspect with stats.as_dict()
+    stats = CacheStatistics()
+    local_cache = LocalObjectCache(LOCAL_CACHE_MAX_ENTRIES)
+    flights = SingleFlight()
+    persistent_store = PersistentObjectStore(PERSISTENT_CACHE_PATH) if PERSISTENT_CACHE_PATH else None
+    _refresh_executor = None
+
     def __init__(self, provider):
         self.provider = provider
         self.provider.adapter = self
@@ -436,17 +1817,336 @@ class CachingProviderWrapper(EveProvider):
     def format_cache_key_name(obj_class, obj_id):
         return '%s__%s' % (obj_class.__name__.lower(), obj_id)
 
+    def __cache_local(self, type_name, cache_key_name, obj, timeout):
+        self.local_cache.set(cache_key_name, obj, min(LOCAL_CACHE_DURATIONS.get(type_name, 0), timeout))
+
+    def entries(self, obj_class, obj_ids, not_found=False):
+        """
+        Reads entries from the django cache, including expired entries kept to be revalidated by ETag
+        :param not_found: also return entries recording that the object wasn't found, whose object is NOT_FOUND
+        :return: dict of ID: tuple of (object, ETag or None, timestamp the object expires)
+        """
+        keys = {self.format_cache_key_name(obj_class, obj_id): int(obj_id) for obj_id in obj_ids}
+        if not keys:
+            return {}
+        # entities cached under another schema version unpickle as None, and bare objects are from earlier versions
+        found = {key: entry for key, entry in cache.get_many(list(keys)).items()
+                 if isinstance(entry, tuple) and (isinstance(entry[0], Entity) or not_found and entry[0] == NOT_FOUND)}
+        remaining = [key for key in keys if key not in found]
+        if self.persistent_store and remaining:
+            stored = self.persistent_store.get_many(remaining)
+            self.stats.incr(obj_class.__name__.lower(), 'persistent_hit', len(stored))
+            # copied up so other hosts sharing the django cache find them there
+            now = time.time()
+            for key, (entry, keep_until) in stored.items():
+                cache.set(key, entry, max(int(keep_until - now), 1))
+                found[key] = entry
+        return {keys[key]: entry for key, entry in found.items()}
+
+    def lookup(self, obj_class, obj_ids):
+        """
+        Reads objects from local memory, then the django cache for the remainder
+        :return: tuple of (dict of ID:object for unexpired objects, dict of ID:entry for expired entries, set of IDs
+        recently not found)
+        """
+        type_name = obj_class.__name__.lower()
+        keys = {self.format_cache_key_name(obj_class, obj_id): int(obj_id) for obj_id in obj_ids}
+        objs = {}
+        for key, obj_id in keys.items():
+            obj = self.local_cache.get(key)
+            if obj is not None:
+                objs[obj_id] = obj
+        self.stats.incr(type_name, 'local_hit', len(objs))
+        entries = self.entries(obj_class, [obj_id for obj_id in keys.values() if obj_id not in objs], not_found=True)
+        expired = {}
+        stale = []
+        not_found = set()
+        now = time.time()
+        for obj_id, entry in entries.items():
+            obj, etag, expires = entry
+            if not isinstance(obj, Entity):
+                if expires > now:
+                    not_found.add(obj_id)
+            elif expires > now:
+                self.__cache_local(type_name, self.format_cache_key_name(obj_class, obj_id), obj, expires - now)
+                objs[obj_id] = obj
+                self.stats.incr(type_name, 'hit')
+            elif expires + STALE_DURATIONS.get(type_name, 0) > now:
+                # served as is while a fresh copy is retrieved in the background
+                objs[obj_id] = obj
+                stale.append(obj_id)
+            else:
+                expired[obj_id] = entry
+        self.stats.incr(type_name, 'negative_hit', len(not_found))
+        if stale:
+            self.stats.incr(type_name, 'stale', len(stale))
+            self.__revalidate(obj_class, stale)
+        return objs, expired, not_found
+
+    def __revalidate(self, obj_class, obj_ids):
+        """
+        Schedules stale objects to be retrieved again, as a celery task if settings.EVEONLINE_STALE_REFRESH is 'celery'
+        otherwise in a background thread
+        """
+        # only schedule each object once across processes while its refresh is due
+        obj_ids = [obj_id for obj_id in obj_ids
+                   if cache.add('%s__refresh' % self.format_cache_key_name(obj_class, obj_id), True,
+                                SINGLE_FLIGHT_TIMEOUT)]
+        if not obj_ids:
+            return
+        if STALE_REFRESH == 'celery':
+            # tasks import the models, which import this module
+            from eveonline.tasks import refresh_cached_objects
+            refresh_cached_objects.delay(obj_class.__name__.lower(), obj_ids)
+        else:
+            self.refresh_executor().submit(self.__refresh_in_thread, obj_class, obj_ids)
+
+    @classmethod
+    def refresh_executor(cls):
+        with _pool_lock:
+            if cls._refresh_executor is None:
+                cls._refresh_executor = ThreadPoolExecutor(max_workers=2)
+            return cls._refresh_executor
+
+    def __refresh_in_thread(self, obj_class, obj_ids):
+        try:
+            self.refresh(obj_class, obj_ids)
+        except Exception:
+            logger.exception('Failed to refresh %s %s objects', len(obj_ids), obj_class.__name__)
+        finally:
+            connections.close_all()
+
+    def refresh(self, obj_class, obj_ids):
+        """
+        Retrieves objects again as background requests, replacing the cached copies
+        :param obj_class: :class:`eveonline.providers.Entity` subclass
+        :param obj_ids: IDs of objects to retrieve
+        """
+        with background_requests():
+            getattr(self, 'get_%ss' % obj_class.__name__.lower())(obj_ids, new=True)
+
+    def cached(self, obj_class, obj_ids):
+        """
+        Reads unexpired objects from local memory, then the django cache for the remainder
+        :return: dict of ID:object for those found
+        """
+        return self.lookup(obj_class, obj_ids)[0]
+
+    def store_not_found(self, obj_class, obj_ids, timeout=None):
+        """
+        Records that objects don't exist, so they aren't requested from the provider again until the record expires
+        :param obj_class: :class:`eveonline.providers.Entity` subclass
+        :param obj_ids: IDs which were not found
+        :param timeout: seconds to record for, defaults to settings.EVEONLINE_NEGATIVE_CACHE_DURATION
+        """
+        timeout = NEGATIVE_CACHE_DURATION if timeout is None else int(timeout)
+        keys = [self.format_cache_key_name(obj_class, obj_id) for obj_id in obj_ids]
+        if timeout <= 0 or not keys:
+            return
+        expires = time.time() + timeout
+        cache.set_many({key: (NOT_FOUND, None, expires) for key in keys}, timeout)
+        for key in keys:
+            self.local_cache.delete(key)
+
+    def purge_not_found(self, obj_class, obj_ids):
+        """
+        Removes records of objects not being found, for instance when an ID is known to have become valid
+        :param obj_class: :class:`eveonline.providers.Entity` subclass
+        :param obj_ids: IDs to remove records of
+        """
+        entries = self.entries(obj_class, obj_ids, not_found=True)
+        cache.delete_many([self.format_cache_key_name(obj_class, obj_id) for obj_id, entry in entries.items()
+                           if not isinstance(entry[0], Entity)])
+
+    def store(self, objs, timeout=None, local=True, etags=None):
+        """
+        Writes objects to the django cache and local memory
+        :param objs: iterable of :class:`eveonline.providers.Entity`
+        :param timeout: seconds to cache for, defaults to settings.EVEONLINE_OBJ_CACHE_DURATION
+        :param local: also hold the objects in local memory
+        :param etags: dict of ID:ETag of the objects, to revalidate them with once expired
+        """
+        timeout = OBJ_CACHE_DURATION if timeout is None else max(int(timeout), 0)
+        etags = etags or {}
+        expires = time.time() + timeout
+        entries = {}
+        for obj in objs:
+            etag = etags.get(int(obj.id))
+            # objects are kept past expiry to be served while stale, and if they have an ETag to be revalidated cheaply
+            retention = max(STALE_DURATIONS.get(obj.__class__.__name__.lower(), 0), ETAG_RETENTION if etag else 0)
+            entries.setdefault(timeout + retention, {})[
+                self.format_cache_key_name(obj.__class__, obj.id)] = (obj, etag, expires)
+        for cache_timeout, keyed in entries.items():
+            if cache_timeout <= 0:
+                continue
+            cache.set_many(keyed, cache_timeout)
+            if self.persistent_store:
+                self.persistent_store.set_many(keyed, cache_timeout)
+            if local:
+                for key, (obj, etag, expires) in keyed.items():
+                    self.__cache_local(obj.__class__.__name__.lower(), key, obj, timeout)
+
+    def __fetch(self, obj_class, obj_id, entry=None):
+        """
+        Retrieves an object once however many threads request it at the same time, waiting for and sharing the result
+        of a retrieval already in progress
+        """
+        key = self.format_cache_key_name(obj_class, obj_id)
+        leading, following = self.flights.claim([key])
+        if following:
+            if following[key].wait(SINGLE_FLIGHT_TIMEOUT):
+                self.stats.incr(obj_class.__name__.lower(), 'collapsed')
+                if following[key].error is not None:
+                    raise following[key].error
+                return copy.copy(following[key].value)
+            # taking too long, so don't wait any more
+            return self.__fetch_shared(obj_class, obj_id, entry)
+        try:
+            obj = self.__fetch_shared(obj_class, obj_id, entry)
+        except Exception as e:
+            self.flights.finish(key, error=e)
+            raise
+        self.flights.finish(key, obj)
+        return obj
+
+    def __fetch_shared(self, obj_class, obj_id, entry=None):
+        """
+        Retrieves an object once however many processes request it at the same time, using a lock in the django cache
+        Processes which don't get the lock wait for the retrieved object to appear in the cache
+        """
+        key = self.format_cache_key_name(obj_class, obj_id)
+        lock_key = '%s__lock' % key
+        if cache.add(lock_key, True, SINGLE_FLIGHT_TIMEOUT):
+            try:
+                return self.__retrieve(obj_class, obj_id, entry)
+            finally:
+                cache.delete(lock_key)
+
+        # a forced refresh must not be satisfied by the entry it is replacing
+        previous = entry[2] if entry else None
+        deadline = time.time() + SINGLE_FLIGHT_TIMEOUT
+        while time.time() < deadline:
+            time.sleep(0.05)
+            current = self.entries(obj_class, [obj_id], not_found=True).get(int(obj_id))
+            if current and current[2] != previous and current[2] > time.time():
+                self.stats.incr(obj_class.__name__.lower(), 'collapsed')
+                if not isinstance(current[0], Entity):
+                    raise ObjectNotFound(obj_id, obj_class.__name__.lower())
+                return current[0]
+            if not cache.get(lock_key):
+                # finished without storing an object, so find out why
+                break
+        return self.__retrieve(obj_class, obj_id, entry)
+
+    def __retrieve(self, obj_class, obj_id, entry=None):
+        """
+        Retrieves an object from the provider, revalidating the expired cache entry if it has an ETag
+        The cache lifetime follows the expiry reported by the provider, if any
+        """
+        try:
+            obj, etag, expires = self.provider.get_conditional(obj_class, obj_id, etag=entry[1] if entry else None)
+        except ObjectNotFound:
+            # only not found is recorded, other errors may be temporary
+            self.store_not_found(obj_class, [obj_id])
+            raise
+        if obj is None:
+            # unchanged, so the expired copy is current again
+            self.stats.incr(obj_class.__name__.lower(), 'not_modified')
+            obj = entry[0]
+        self.store([obj], timeout=None if expires is None else expires - time.time(), etags={int(obj_id): etag})
+        return obj
+
     def __get_object(self, obj_class, obj_id, new=False):
-        cache_key_name = self.format_cache_key_name(obj_class, obj_id)
-        method = getattr(self.provider, 'get_%s' % obj_class.__name__.lower())
+        type_name = obj_class.__name__.lower()
+        # a forced refresh still revalidates by ETag, so needs the entry even if it hasn't expired
         if new:
-            obj = method(obj_id)
-            cache.set(cache_key_name, obj, OBJ_CACHE_DURATION)
+            objs, expired, not_found = {}, self.entries(obj_class, [obj_id]), ()
         else:
-            obj = cache.get_or_set(cache_key_name, method(obj_id), OBJ_CACHE_DURATION)
-            obj.provider = self
+            objs, expired, not_found = self.lookup(obj_class, [obj_id])
+        if int(obj_id) in not_found:
+            raise ObjectNotFound(obj_id, type_name)
+        obj = objs.get(int(obj_id))
+        if obj is None:
+            # only go to the provider on a miss
+            self.stats.incr(type_name, 'refresh' if new else 'miss')
+            obj = self.__fetch(obj_class, obj_id, expired.get(int(obj_id)))
+        obj.provider = self
         return obj
 
+    def __get_objects(self, obj_class, obj_ids, new=False):
+        """
+        Multi-get: reads all requested objects from the cache at once and only asks the provider for the misses
+        """
+        type_name = obj_class.__name__.lower()
+        obj_ids = set(int(obj_id) for obj_id in obj_ids)
+        if new:
+            objs, expired, not_found = {}, self.entries(obj_class, obj_ids), ()
+        else:
+            objs, expired, not_found = self.lookup(obj_class, obj_ids)
+        missing = [obj_id for obj_id in obj_ids if obj_id not in objs and obj_id not in not_found]
+        self.stats.incr(type_name, 'refresh' if new else 'miss', len(missing))
+        if missing:
+            if obj_class in self.provider.conditional_types:
+                # retrieved one at a time regardless, so revalidate each by ETag
+                fetched = self._get_many(lambda obj_id: self.__fetch(obj_class, obj_id, expired.get(obj_id)), missing)
+            else:
+                fetched = self.__fetch_many(obj_class, missing)
+            objs.update(fetched)
+        for obj in objs.values():
+            obj.provider = self
+        return objs
+
+    def __fetch_many(self, obj_class, obj_ids):
+        """
+        Retrieves objects with one bulk provider call, except for those already being retrieved by another thread
+        whose results are waited for instead
+        """
+        type_name = obj_class.__name__.lower()
+        keys = {self.format_cache_key_name(obj_class, obj_id): obj_id for obj_id in obj_ids}
+        leading, following = self.flights.claim(keys)
+        fetched = {}
+        try:
+            if leading:
+                fetched = getattr(self.provider, 'get_%ss' % type_name)([keys[key] for key in leading])
+                self.store(fetched.values())
+                # bulk methods omit IDs which don't exist, and raise on other errors
+                self.store_not_found(obj_class, [keys[key] for key in leading if keys[key] not in fetched])
+        except Exception as e:
+            for key in leading:
+                self.flights.finish(key, error=e)
+            raise
+        for key in leading:
+            if keys[key] in fetched:
+                self.flights.finish(key, fetched[keys[key]])
+            else:
+                # single lookups waiting on the flight must raise, as they would have themselves
+                self.flights.finish(key, error=ObjectNotFound(keys[key], type_name))
+
+        retry = []
+        for key, flight in following.items():
+            # not found is an answer, anything else is retried
+            finished = flight.wait(SINGLE_FLIGHT_TIMEOUT)
+            if finished and (flight.error is None or isinstance(flight.error, ObjectNotFound)):
+                self.stats.incr(type_name, 'collapsed')
+                if flight.value is not None:
+                    fetched[keys[key]] = copy.copy(flight.value)
+            else:
+                retry.append(keys[key])
+        if retry:
+            retried = getattr(self.provider, 'get_%ss' % type_name)(retry)
+            self.store(retried.values())
+            self.store_not_found(obj_class, [obj_id for obj_id in retry if obj_id not in retried])
+            fetched.update(retried)
+        return fetched
+
+    def get_affiliations(self, obj_ids):
+        # affiliations are how changes are detected, so always ask the provider
+        return self.provider.get_affiliations(obj_ids)
+
+    def prime(self, objs, timeout=None):
+        # these are usually large lists, so don't let them push everything else out of local memory
+        self.store(objs, timeout=timeout, local=False)
+
     def get_character(self, obj_id, new=False):
         return self.__get_object(Character, obj_id, new=new)
 
@@ -462,14 +2162,49 @@ class CachingProviderWrapper(EveProvider):
     def get_faction(self, obj_id, new=False):
         return self.__get_object(Faction, obj_id, new=new)
 
+    def get_characters(self, obj_ids, new=False):
+        return self.__get_objects(Character, obj_ids, new=new)
+
+    def get_corporations(self, obj_ids, new=False):
+        return self.__get_objects(Corporation, obj_ids, new=new)
+
+    def get_alliances(self, obj_ids, new=False):
+        return self.__get_objects(Alliance, obj_ids, new=new)
+
+    def get_itemtypes(self, obj_ids, new=False):
+        return self.__get_objects(ItemType, obj_ids, new=new)
+
+    def get_factions(self, obj_ids, new=False):
+        return self.__get_objects(Faction, obj_ids, new=new)
+
 
 def eve_provider_factory(api_key=None, token=None, default_provider=None):
-    default_provider = default_provider or DEFAULT_PROVIDER
-
-    if default_provider.lower() == 'xml':
-        provider = EveXmlProvider(api_key=api_key)
-    elif default_provider.lower() == 'esi':
-        provider = EveSwaggerProvider(token=token)
-    else:
-        raise ValueError('Unrecognized provider "%s"' % default_provider)
-    return CachingProviderWrapper(provider)
+    """
+    Returns a caching provider, reusing an existing one for the same source and credentials
+    Use :func:`clear_provider_pool` to discard existing providers
+    :param default_provider: 'esi', 'xml', or several separated by commas to fail over between them in that order,
+    defaults to settings.EVEONLINE_DEFAULT_PROVIDER
+    """
+    sources = tuple(source.strip() for source in (default_provider or DEFAULT_PROVIDER).lower().split(','))
+    for source in sources:
+        if source not in ('esi', 'xml'):
+            raise ValueError('Unrecognized provider "%s"' % source)
+
+    key = (
+        sources,
+        api_key if 'xml' in sources else None,
+        getattr(token, 'pk', None) if 'esi' in sources else None,
+        tuple(sorted(EveSwaggerProvider.versions.items())) if 'esi' in sources else None,
+    )
+
+    with _pool_lock:
+        if key not in _providers:
+            providers = [EveXmlProvider(api_key=api_key) if source == 'xml' else EveSwaggerProvider(token=token)
+                         for source in sources]
+            provider = providers[0] if len(providers) == 1 else FailoverProvider(providers)
+            if SDE_PROVIDER:
+                provider = SdeProvider(provider)
+            if DATABASE_PROVIDER:
+                provider = DatabaseEveProvider(provider)
+            _providers[key] = CachingProviderWrapper(provider)
+        return _providers[key]
@@ -1,8 +1,13 @@
 from celery.task import periodic_task
 from celery import shared_task
-from eveonline.models import Character, Corporation, Alliance
-from eveonline.providers import eve_provider_factory
+from eveonline.app_settings import BULK_UPDATE_CHUNK_SIZE, INCREMENTAL_CHARACTER_UPDATES
+from eveonline.models import Character, Corporation, Alliance, warm_provider_cache
+from eveonline.providers import chunked, background_requests, eve_provider_factory
+from eveonline import providers
 from datetime import timedelta
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task
@@ -13,7 +18,8 @@ def update_character(obj_id, provider=None):
     :param provider: :class:`eveonline.provders.EveProvider`
     """
     char = Character.objects.get(id=obj_id)
-    char.update(provider=provider)
+    with background_requests():
+        char.update(provider=provider)
 
 
 @shared_task
@@ -24,7 +30,8 @@ def update_corporation(obj_id, provider=None):
     :param provider: :class:`eveonline.provders.EveProvider`
     """
     corp = Corporation.objects.get(id=obj_id)
-    corp.update(provider=provider)
+    with background_requests():
+        corp.update(provider=provider)
 
 
 @shared_task
@@ -35,18 +42,100 @@ def update_alliance(obj_id, provider=None):
     :param provider: :class:`eveonline.provders.EveProvider`
     """
     alliance = Alliance.objects.get(id=obj_id)
-    alliance.update(provider=provider)
+    with background_requests():
+        alliance.update(provider=provider)
+
+
+def _bulk_refresh(model, obj_ids):
+    # periodic refreshes give way to interactive lookups
+    with background_requests():
+        counts = model.bulk_refresh(obj_ids)
+    logger.info('Refreshed %s %s models: %s changed, %s unchanged, %s missing', len(obj_ids),
+                model.__name__, counts['changed'], counts['unchanged'], counts['missing'])
+    return counts
+
+
+@shared_task
+def update_characters(obj_ids):
+    """
+    Updates a batch of character models from bulk provider calls
+    :param obj_ids: list of Character IDs to update
+    :return: Dictionary of counts of changed, unchanged and missing models
+    """
+    return _bulk_refresh(Character, obj_ids)
+
+
+@shared_task
+def update_character_affiliations(obj_ids):
+    """
+    Updates the corporation, alliance and faction of a batch of character models, only writing those which changed
+    :param obj_ids: list of Character IDs to update
+    :return: Dictionary of counts of changed, unchanged and missing models
+    """
+    with background_requests():
+        counts = Character.refresh_affiliations(obj_ids)
+    logger.info('Checked affiliations of %s Character models: %s changed, %s unchanged, %s missing', len(obj_ids),
+                counts['changed'], counts['unchanged'], counts['missing'])
+    return counts
+
+
+@shared_task
+def update_corporations(obj_ids):
+    """
+    Updates a batch of corporation models from bulk provider calls
+    :param obj_ids: list of Corporation IDs to update
+    :return: Dictionary of counts of changed, unchanged and missing models
+    """
+    return _bulk_refresh(Corporation, obj_ids)
+
+
+@shared_task
+def update_alliances(obj_ids):
+    """
+    Updates a batch of alliance models from bulk provider calls
+    :param obj_ids: list of Alliance IDs to update
+    :return: Dictionary of counts of changed, unchanged and missing models
+    """
+    return _bulk_refresh(Alliance, obj_ids)
+
+
+@shared_task
+def refresh_cached_objects(type_name, obj_ids):
+    """
+    Retrieves stale cached objects again, replacing the cached copies
+    :param type_name: object type, for instance 'character'
+    :param obj_ids: list of IDs to retrieve
+    """
+    obj_classes = {obj_class.__name__.lower(): obj_class for obj_class in (
+        providers.Character, providers.Corporation, providers.Alliance, providers.ItemType, providers.Faction)}
+    eve_provider_factory().refresh(obj_classes[type_name], obj_ids)
+
+
+@shared_task
+def warm_cache(type_names=None):
+    """
+    Loads the objects of all stored models into the provider cache, for instance after the cache was cleared
+    :param type_names: object types to load, for instance ['alliance', 'corporation'], defaults to all
+    :return: dict of type name: number of objects loaded
+    """
+    return warm_provider_cache(type_names=type_names)
+
+
+def _queue_chunked(model, task):
+    """
+    Queues a bulk update task for every chunk of model IDs
+    """
+    for obj_ids in chunked(model.objects.values_list('id', flat=True).iterator(), BULK_UPDATE_CHUNK_SIZE):
+        task.delay(obj_ids)
 
 
 @periodic_task(run_every=timedelta(hours=3))
 def update_all_characters():
     """
     Triggers an update of all Character models
+    Only affiliations are checked if settings.EVEONLINE_INCREMENTAL_CHARACTER_UPDATES is set
     """
-    char_ids = [c.id for c in Character.objects.all()]
-    provider = eve_provider_factory()
-    for obj_id in char_ids:
-        update_character.delay(obj_id, provider=provider)
+    _queue_chunked(Character, update_character_affiliations if INCREMENTAL_CHARACTER_UPDATES else update_characters)
 
 
 @periodic_task(run_every=timedelta(hours=8))
@@ -54,10 +143,7 @@ def update_all_corps():
     """
     Triggers an update of all Corporation models
     """
-    corp_ids = [c.id for c in Corporation.objects.all()]
-    provider = eve_provider_factory()
-    for obj_id in corp_ids:
-        update_corporation.delay(obj_id, provider=provider)
+    _queue_chunked(Corporation, update_corporations)
 
 
 @shared_task  # data only changes very rarely on CCP intervention, don't queue periodically
@@ -65,7 +151,4 @@ def update_all_alliances():
     """
     Triggers an update of all Alliance models
     """
-    alliance_ids = [a.id for a in Alliance.objects.all()]
-    provider = eve_provider_factory()
-    for obj_id in alliance_ids:
-        update_alliance.delay(obj_id, provider=provider)
+    _queue_chunked(Alliance, update_alliances)
@@ -1 +1,161 @@
+from __future__ import unicode_literals, print_function
+from django.core.cache import cache
 from django.test import TestCase
+from eveonline import providers
+from eveonline.providers import Entity, Corporation, Alliance, Character, ItemType, Faction, from_compact, \
+    CachingProviderWrapper, EveProvider, ObjectNotFound
+from functools import reduce
+from unittest import skipUnless
+import os
+import pickle
+import threading
+import time
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class EntitySerialisationTestCase(TestCase):
+    def setUp(self):
+        self.entities = [
+            Entity(1, 'entity'),
+            Corporation(98000001, 'corporation', 'CORP', 90000001, 42, 99000001, 500001),
+            Corporation(98000002, 'no alliance', 'NONE', 90000002, 1, None, None),
+            Alliance(99000001, 'alliance', 'ALLY', [98000001, 98000003], 98000001),
+            Character(90000001, 'character', 98000001),
+            ItemType(587, 'Rifter'),
+            Faction(500001, 'Caldari State', 'description'),
+        ]
+
+    def assertSameEntity(self, restored, obj):
+        self.assertIs(type(restored), type(obj))
+        self.assertEqual(restored.to_compact(), obj.to_compact())
+
+    def test_compact_round_trip(self):
+        for obj in self.entities:
+            self.assertSameEntity(from_compact(obj.to_compact()), obj)
+
+    def test_pickle_round_trip(self):
+        for obj in self.entities:
+            self.assertSameEntity(pickle.loads(pickle.dumps(obj)), obj)
+
+    def test_pickle_drops_provider(self):
+        obj = Character(90000001, 'character', 98000001, provider=object())
+        self.assertIsNone(pickle.loads(pickle.dumps(obj))._provider)
+
+    def test_schema_version_mismatch(self):
+        for obj in self.entities:
+            data = obj.to_compact()
+            pickled = pickle.dumps(obj)
+            with mock.patch('eveonline.providers.ENTITY_SCHEMA_VERSION', providers.ENTITY_SCHEMA_VERSION + 1):
+                with self.assertRaises(ValueError):
+                    from_compact(data)
+                self.assertIsNone(pickle.loads(pickled))
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValueError):
+            from_compact((providers.ENTITY_SCHEMA_VERSION, 99, 1, 'unknown'))
+
+
+class OmittingProvider(EveProvider):
+    """
+    Bulk lookups block until released, then omit every ID as though none exist
+    """
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.single_calls = []
+
+    def get_characters(self, character_ids):
+        self.started.set()
+        self.release.wait(5)
+        return {}
+
+    def get_character(self, character_id):
+        self.single_calls.append(character_id)
+        raise ObjectNotFound(character_id, 'character')
+
+
+class SingleFlightTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        CachingProviderWrapper.local_cache.clear()
+
+    def test_lookup_waiting_on_bulk_lookup_omitting_id(self):
+        provider = OmittingProvider()
+        wrapper = CachingProviderWrapper(provider)
+        results = {}
+
+        def get_many():
+            results['many'] = wrapper.get_characters([5])
+
+        def get_one():
+            try:
+                results['one'] = wrapper.get_character(5)
+            except Exception as e:
+                results['one'] = e
+
+        bulk = threading.Thread(target=get_many)
+        bulk.start()
+        self.assertTrue(provider.started.wait(5))
+        single = threading.Thread(target=get_one)
+        single.start()
+        # let the single lookup join the bulk lookup's flight
+        time.sleep(0.2)
+        provider.release.set()
+        bulk.join(5)
+        single.join(5)
+
+        self.assertEqual(results['many'], {})
+        self.assertIsInstance(results['one'], ObjectNotFound)
+        self.assertEqual(provider.single_calls, [])
+
+
+@skipUnless(os.environ.get('EVEONLINE_BENCHMARK'), 'set EVEONLINE_BENCHMARK=1 to run benchmarks')
+class MappingBenchmark(TestCase):
+    """
+    Cost of mapping provider objects to model attributes for a bulk import
+    Compares the accessors compiled when the model is prepared with working them out again for every object, as
+    mapping did before they were compiled
+    """
+
+    count = 100000
+
+    def setUp(self):
+        alliance = Alliance(99000001, 'alliance', 'ALLY', [], 98000001)
+        faction = Faction(500001, 'Caldari State', 'description')
+        self.objs = []
+        for obj_id in range(98000001, 98000001 + self.count):
+            obj = Corporation(obj_id, 'corporation %s' % obj_id, 'CORP', 90000001, 42, None, None)
+            obj.alliance = alliance
+            obj.faction = faction
+            self.objs.append(obj)
+
+    @staticmethod
+    def timed(func, objs):
+        start = time.time()
+        for obj in objs:
+            func(obj)
+        return time.time() - start
+
+    def test_map_obj_attributes(self):
+        # models import the providers, so aren't imported until needed
+        from eveonline.models import Corporation as CorporationModel
+
+        def uncompiled(obj):
+            values = {}
+            for field_name, path in CorporationModel.compile_provider_accessors():
+                try:
+                    values[field_name] = reduce(getattr, path, obj)
+                except AttributeError:
+                    pass
+            return values
+
+        self.assertEqual(CorporationModel.map_obj_attributes(self.objs[0]), uncompiled(self.objs[0]))
+        compiled_time = self.timed(CorporationModel.map_obj_attributes, self.objs)
+        uncompiled_time = self.timed(uncompiled, self.objs)
+        print('\nMapped %s corporations: %.2fs compiled, %.2fs resolving accessors for each object' %
+              (self.count, compiled_time, uncompiled_time))
@@ -14,7 +14,11 @@ setup(
         'evelink>=0.7.4',
         'celery>=4.0',
         'adarnauth-esi>=1.2.2',
+        'futures>=3.0;python_version<"3"',
     ],
+    extras_require={
+        'async': ['aiohttp>=2.0'],
+    },
     packages=find_packages(),
     include_package_data=True,
     license='GNU GPLv3',